@@ -0,0 +1,704 @@
+from ChessPieces import ChessPieces
+from ChessBoard import (
+    ChessBoard,
+    BOARD_COLUMNS,
+    ALL_CASTLING_RIGHTS,
+    WHITE_KINGSIDE,
+    WHITE_QUEENSIDE,
+    BLACK_KINGSIDE,
+    BLACK_QUEENSIDE,
+    CASTLING_LOSSES,
+    PROMOTION_PIECES,
+    game_status,
+    perft_divide_nodes,
+    perft_nodes,
+)
+
+# Order of the twelve piece bitboards: white pieces first, then black pieces.
+PIECE_TYPES = ["pawn", "knight", "bishop", "rook", "queen", "king"]
+COLORS = ["white", "black"]
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# Square index is row * 8 + col, so row 0 (black back rank) holds bits 0-7.
+FULL_MASK = (1 << 64) - 1
+# Columns a pawn cannot capture away from, for the shifts of the pawn captures.
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+# Rows a pawn of each color promotes on.
+PROMOTION_ROWS = [0xFF, 0xFF << 56]
+
+# Castling rights kept when a piece moves from or to a square.
+CASTLING_KEPT = [ALL_CASTLING_RIGHTS] * 64
+for (_row, _col), _rights in CASTLING_LOSSES.items():
+    CASTLING_KEPT[_row * 8 + _col] &= ~_rights
+
+# Castling of each color as (right, king end square, squares that must be empty,
+# squares the king crosses that must not be attacked, rook start square, rook end square).
+CASTLING_MOVES = [
+    [
+        (WHITE_KINGSIDE, 62, (1 << 61) | (1 << 62), (61, 62), 63, 61),
+        (WHITE_QUEENSIDE, 58, (1 << 57) | (1 << 58) | (1 << 59), (59, 58), 56, 59),
+    ],
+    [
+        (BLACK_KINGSIDE, 6, (1 << 5) | (1 << 6), (5, 6), 7, 5),
+        (BLACK_QUEENSIDE, 2, (1 << 1) | (1 << 2) | (1 << 3), (3, 2), 0, 3),
+    ],
+]
+# Rook start and end squares keyed by the end square of the castling king.
+CASTLING_ROOKS = {
+    king_end: (rook_start, rook_end)
+    for moves in CASTLING_MOVES
+    for _, king_end, _, _, rook_start, rook_end in moves
+}
+
+
+def _build_step_table(offsets):
+    """The function precomputes the destination mask of a jumping piece for every square.
+    Inputs:
+            - offsets: list of (row, col) steps
+    Output:
+            - table: list of 64 integers"""
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        for step_row, step_col in offsets:
+            end_row, end_col = row + step_row, col + step_col
+            if 0 <= end_row < 8 and 0 <= end_col < 8:
+                mask |= 1 << (end_row * 8 + end_col)
+        table.append(mask)
+    return table
+
+
+def _build_ray_table(step_row, step_col):
+    """The function precomputes the ray mask of a sliding direction for every square.
+    Inputs:
+            - step_row: integer
+            - step_col: integer
+    Output:
+            - table: list of 64 integers"""
+    table = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        row, col = row + step_row, col + step_col
+        while 0 <= row < 8 and 0 <= col < 8:
+            mask |= 1 << (row * 8 + col)
+            row, col = row + step_row, col + step_col
+        table.append(mask)
+    return table
+
+
+KNIGHT_ATTACKS = _build_step_table(
+    [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+)
+KING_ATTACKS = _build_step_table(
+    [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+)
+# Squares attacked by a pawn of each color standing on a square.
+PAWN_ATTACKS = [_build_step_table([(-1, -1), (-1, 1)]), _build_step_table([(1, -1), (1, 1)])]
+
+# Rays that grow towards higher square indexes use the lowest set bit as first blocker,
+# rays that grow towards lower indexes use the highest one.
+POSITIVE_ROOK_RAYS = [_build_ray_table(1, 0), _build_ray_table(0, 1)]
+NEGATIVE_ROOK_RAYS = [_build_ray_table(-1, 0), _build_ray_table(0, -1)]
+POSITIVE_BISHOP_RAYS = [_build_ray_table(1, 1), _build_ray_table(1, -1)]
+NEGATIVE_BISHOP_RAYS = [_build_ray_table(-1, 1), _build_ray_table(-1, -1)]
+
+
+# Board coordinates of every square index, so moves are built without divmod.
+SQUARE_POSITIONS = [divmod(square, 8) for square in range(64)]
+
+# Every ray direction as (rays, True if the first blocker is the lowest bit, True for rook lines).
+RAY_DIRECTIONS = (
+    [(rays, True, True) for rays in POSITIVE_ROOK_RAYS]
+    + [(rays, False, True) for rays in NEGATIVE_ROOK_RAYS]
+    + [(rays, True, False) for rays in POSITIVE_BISHOP_RAYS]
+    + [(rays, False, False) for rays in NEGATIVE_BISHOP_RAYS]
+)
+
+
+def _slider_attacks(square, occupied, positive_rays, negative_rays):
+    """The function calculates the squares reached by a sliding piece, stopping at blockers.
+    Inputs:
+            - square: integer
+            - occupied: integer bitboard
+            - positive_rays: list of ray tables
+            - negative_rays: list of ray tables
+    Output:
+            - attacks: integer bitboard"""
+    attacks = 0
+    for rays in positive_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            first = (blockers & -blockers).bit_length() - 1
+            ray ^= rays[first]
+        attacks |= ray
+    for rays in negative_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            first = blockers.bit_length() - 1
+            ray ^= rays[first]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    """The function returns the rook attack bitboard from a square."""
+    return _slider_attacks(square, occupied, POSITIVE_ROOK_RAYS, NEGATIVE_ROOK_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    """The function returns the bishop attack bitboard from a square."""
+    return _slider_attacks(square, occupied, POSITIVE_BISHOP_RAYS, NEGATIVE_BISHOP_RAYS)
+
+
+def iterate_bits(bitboard):
+    """The function yields the square index of every set bit of a bitboard."""
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+class BitBoard:
+    """Chess board stored as twelve 64-bit piece bitboards plus occupancy masks.
+    It offers the same interface as ChessBoard so it can be used by ChessGame."""
+
+    def __init__(self, fen=None):
+        """The function initializes the bitboards with the starting position or a FEN position.
+        Inputs:
+                - fen: optional FEN string of the position"""
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        # Game state that is not visible in the bitboards.
+        self.turn = "white"
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant = -1  # Square a pawn skipped with a double step, or -1
+        self.undo_stack = []  # Undo records of the moves played with move_piece
+        if fen is None:
+            self.create_pieces()
+        else:
+            self.load_fen(fen)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """The function creates a board from a FEN string.
+        Inputs:
+                - fen: string
+        Output:
+                - board: BitBoard"""
+        return cls(fen)
+
+    def load_fen(self, fen):
+        """The function sets the bitboards to the position described by a FEN string.
+        The string is read and checked by ChessBoard, then its pieces are copied.
+        Inputs:
+                - fen: string"""
+        board = ChessBoard.from_fen(fen)
+        self.bitboards = [0] * 12
+        self.occupancy = [0, 0]
+        self.occupied = 0
+        for color_index, color in enumerate(COLORS):
+            for piece in board.pieces[color]:
+                square = piece.pos[0] * 8 + piece.pos[1]
+                self.place_piece(PIECE_TYPES.index(piece.piece_type), color_index, square)
+        self.turn = board.turn
+        self.castling_rights = board.castling_rights
+        if board.en_passant is None:
+            self.en_passant = -1
+        else:
+            self.en_passant = board.en_passant[0] * 8 + board.en_passant[1]
+        self.undo_stack = []
+
+    def create_pieces(self):
+        """The function places the pieces for both players on the bitboards."""
+        back_rank = [ROOK, KNIGHT, BISHOP, QUEEN, KING, BISHOP, KNIGHT, ROOK]
+        for column in range(BOARD_COLUMNS):
+            self.place_piece(PAWN, 1, 1 * 8 + column)
+            self.place_piece(PAWN, 0, 6 * 8 + column)
+            self.place_piece(back_rank[column], 1, column)
+            self.place_piece(back_rank[column], 0, 7 * 8 + column)
+
+    def place_piece(self, piece_index, color_index, square):
+        """The function sets the bit of a piece on its bitboard and the occupancy masks.
+        Inputs:
+                - piece_index: integer from 0 (pawn) to 5 (king)
+                - color_index: 0 for white, 1 for black
+                - square: integer"""
+        bit = 1 << square
+        self.bitboards[color_index * 6 + piece_index] |= bit
+        self.occupancy[color_index] |= bit
+        self.occupied |= bit
+
+    def piece_at(self, square):
+        """The function finds the bitboard that holds a square.
+        Inputs:
+                - square: integer
+        Output:
+                - index: integer bitboard index, or -1 if the square is empty"""
+        bit = 1 << square
+        if not self.occupied & bit:
+            return -1
+        start = 0 if self.occupancy[0] & bit else 6
+        for index in range(start, start + 6):
+            if self.bitboards[index] & bit:
+                return index
+        return -1
+
+    def draw(self, screen):
+        """The function draws the chessboard and pieces on the screen, see ChessRenderer.draw_board."""
+        # pygame is only needed to draw, so the renderer is imported on demand.
+        from ChessRenderer import draw_board
+
+        draw_board(screen, self)
+
+    @property
+    def pieces(self):
+        """The function lists the pieces of each player, as the pieces attribute of ChessBoard.
+        Output:
+                - pieces: dictionary {color: list of ChessPieces}"""
+        pieces = {"white": [], "black": []}
+        for index, bitboard in enumerate(self.bitboards):
+            color = COLORS[index // 6]
+            for square in iterate_bits(bitboard):
+                pieces[color].append(ChessPieces(PIECE_TYPES[index % 6], color, SQUARE_POSITIONS[square]))
+        return pieces
+
+    @property
+    def king_positions(self):
+        """The function finds the kings, as the king_positions attribute of ChessBoard.
+        Output:
+                - king_positions: dictionary {color: (row, col) or None}"""
+        king_positions = {}
+        for index, color in enumerate(COLORS):
+            square = self.king_square(index)
+            king_positions[color] = SQUARE_POSITIONS[square] if square >= 0 else None
+        return king_positions
+
+    def get_piece(self, position):
+        """The function returns the piece given the position coordinates.
+        Inputs: position as a tuple (row, col)
+        Outputs:chess piece"""
+        square = position[0] * 8 + position[1]
+        index = self.piece_at(square)
+        if index < 0:
+            return None
+        return ChessPieces(PIECE_TYPES[index % 6], COLORS[index // 6], position)
+
+    def move_piece(self, start_position, end_position, screen, promotion="queen"):
+        """The function moves a chess piece.
+        Inputs:
+                - start_position: (row, col)
+                - end_position: (row, col)
+                - screen
+                - promotion: string, piece type a pawn promotes to
+        Output:
+                - condition: boolean"""
+        moving_piece = self.get_piece(start_position)
+        if moving_piece is None:
+            return False
+
+        # Play the move if it is one of the legal moves.
+        for move in self.generate_legal_moves(moving_piece.color):
+            if move[0] == start_position and move[1] == end_position:
+                if move[2] is None or move[2] == promotion:
+                    self.undo_stack.append(self.make_move(move))
+                    if screen is not None:
+                        self.draw(screen)
+                    return True
+        return False
+
+    def make_move(self, move):
+        """The function plays a move in place, including castling, en passant and promotion.
+        Inputs:
+                - move: (start, end, promotion) tuple
+        Output:
+                - undo: tuple used by unmake_move"""
+        (start_row, start_col), (end_row, end_col), promotion = move
+        start = start_row * 8 + start_col
+        end = end_row * 8 + end_col
+        index = self.piece_at(start)
+        color_index = index // 6
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+
+        # An en passant capture removes the pawn beside the destination square.
+        captured_square = end
+        if index % 6 == PAWN and end == self.en_passant:
+            captured_square = start_row * 8 + end_col
+        captured = self.piece_at(captured_square)
+        if captured >= 0:
+            captured_bit = 1 << captured_square
+            bitboards[captured] ^= captured_bit
+            occupancy[captured // 6] ^= captured_bit
+            self.occupied ^= captured_bit
+
+        # A promoted pawn leaves its bitboard for the bitboard of the new piece.
+        start_bit, end_bit = 1 << start, 1 << end
+        end_index = index
+        if promotion is not None:
+            end_index = color_index * 6 + PIECE_TYPES.index(promotion)
+        bitboards[index] ^= start_bit
+        bitboards[end_index] |= end_bit
+        occupancy[color_index] ^= start_bit | end_bit
+        self.occupied ^= start_bit
+        self.occupied |= end_bit
+
+        # Castling also moves the rook to the other side of the king.
+        if index % 6 == KING and abs(end - start) == 2:
+            rook_start, rook_end = CASTLING_ROOKS[end]
+            rook_mask = (1 << rook_start) | (1 << rook_end)
+            bitboards[color_index * 6 + ROOK] ^= rook_mask
+            occupancy[color_index] ^= rook_mask
+            self.occupied ^= rook_mask
+
+        undo = (move, index, end_index, captured, captured_square, self.castling_rights, self.en_passant)
+        self.en_passant = (start + end) // 2 if index % 6 == PAWN and abs(end - start) == 16 else -1
+        self.castling_rights &= CASTLING_KEPT[start] & CASTLING_KEPT[end]
+        self.turn = COLORS[1 - color_index]
+        return undo
+
+    def unmake_move(self, undo):
+        """The function restores the bitboards before a move made with make_move.
+        Inputs:
+                - undo: tuple returned by make_move"""
+        move, index, end_index, captured, captured_square, self.castling_rights, self.en_passant = undo
+        (start_row, start_col), (end_row, end_col), _ = move
+        start = start_row * 8 + start_col
+        end = end_row * 8 + end_col
+        color_index = index // 6
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+
+        start_bit, end_bit = 1 << start, 1 << end
+        bitboards[end_index] ^= end_bit
+        bitboards[index] |= start_bit
+        occupancy[color_index] ^= start_bit | end_bit
+        self.occupied ^= end_bit
+        self.occupied |= start_bit
+        if captured >= 0:
+            captured_bit = 1 << captured_square
+            bitboards[captured] |= captured_bit
+            occupancy[captured // 6] |= captured_bit
+            self.occupied |= captured_bit
+
+        if index % 6 == KING and abs(end - start) == 2:
+            rook_start, rook_end = CASTLING_ROOKS[end]
+            rook_mask = (1 << rook_start) | (1 << rook_end)
+            bitboards[color_index * 6 + ROOK] ^= rook_mask
+            occupancy[color_index] ^= rook_mask
+            self.occupied ^= rook_mask
+        self.turn = COLORS[color_index]
+
+    def piece_moves(self, index, square):
+        """The function calculates the destination bitboard of a piece, own pieces excluded.
+        Castling is generated separately by castling_moves.
+        Inputs:
+                - index: integer bitboard index
+                - square: integer
+        Output:
+                - moves: integer bitboard"""
+        color_index, piece_index = divmod(index, 6)
+        own = self.occupancy[color_index]
+        occupied = self.occupied
+
+        if piece_index == PAWN:
+            bit = 1 << square
+            empty = ~occupied & FULL_MASK
+            if color_index == 0:
+                single = (bit >> 8) & empty
+                double = ((single & (0xFF << 40)) >> 8) & empty
+            else:
+                single = (bit << 8) & empty
+                double = ((single & (0xFF << 16)) << 8) & empty
+            targets = self.occupancy[1 - color_index]
+            if self.en_passant >= 0 and COLORS[color_index] == self.turn:
+                targets |= 1 << self.en_passant
+            captures = PAWN_ATTACKS[color_index][square] & targets
+            return single | double | captures
+        if piece_index == KNIGHT:
+            attacks = KNIGHT_ATTACKS[square]
+        elif piece_index == KING:
+            attacks = KING_ATTACKS[square]
+        elif piece_index == ROOK:
+            attacks = rook_attacks(square, occupied)
+        elif piece_index == BISHOP:
+            attacks = bishop_attacks(square, occupied)
+        else:
+            attacks = rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+        return attacks & ~own
+
+    def castling_moves(self, color_index):
+        """The function lists the castling moves of a player: the right is held, the rook is on its
+        corner, the squares between king and rook are empty, and the king is not in check and
+        crosses no attacked square.
+        Inputs:
+                - color_index: 0 for white, 1 for black
+        Output:
+                - moves: list of (start, end, None) tuples"""
+        moves = []
+        king_square = self.king_square(color_index)
+        rooks = self.bitboards[color_index * 6 + ROOK]
+        for right, king_end, empty_mask, crossed, rook_start, _ in CASTLING_MOVES[color_index]:
+            if not self.castling_rights & right or self.occupied & empty_mask:
+                continue
+            if not rooks >> rook_start & 1:
+                continue  # The XOR of make_move would otherwise create a rook.
+            if self.is_square_attacked(king_square, 1 - color_index):
+                break
+            if any(self.is_square_attacked(square, 1 - color_index) for square in crossed):
+                continue
+            moves.append((divmod(king_square, 8), divmod(king_end, 8), None))
+        return moves
+
+    def is_pseudo_legal(self, index, start, end):
+        """The function checks if a square is reached by the movement pattern of a piece."""
+        return bool(self.piece_moves(index, start) >> end & 1)
+
+    def validate_move(self, piece, start, end):
+        """The function validates moves based on the type of piece.
+        Inputs:
+                - piece: ChessPieces class attribute
+                - start: (row, col)
+                - end: (row, col)
+        Output:
+                - valid_move: boolean"""
+        color_index = COLORS.index(piece.color)
+        index = color_index * 6 + PIECE_TYPES.index(piece.piece_type)
+        start_square = start[0] * 8 + start[1]
+        end_square = end[0] * 8 + end[1]
+        if not self.is_pseudo_legal(index, start_square, end_square):
+            return False
+
+        # The king may not move to a square where it is attacked.
+        if index % 6 == KING:
+            undo = self.make_move((start, end, None))
+            attacked = self.is_square_attacked(end_square, 1 - color_index)
+            self.unmake_move(undo)
+            return not attacked
+        return True
+
+    def king_square(self, color_index):
+        """The function returns the square of the king of a player, or -1 if there is no king."""
+        return self.bitboards[color_index * 6 + KING].bit_length() - 1
+
+    def attackers_of(self, square, by_color_index, occupied=None):
+        """The function returns the bitboard of the pieces of a player attacking a square.
+        Inputs:
+                - square: integer
+                - by_color_index: 0 for white, 1 for black
+                - occupied: integer bitboard blocking the sliding pieces, the board occupancy by default
+        Output:
+                - attackers: integer bitboard"""
+        if occupied is None:
+            occupied = self.occupied
+        base = by_color_index * 6
+        boards = self.bitboards
+        # A pawn attacks the square if a pawn of the defender on the square would attack it back.
+        attackers = PAWN_ATTACKS[1 - by_color_index][square] & boards[base + PAWN]
+        attackers |= KNIGHT_ATTACKS[square] & boards[base + KNIGHT]
+        attackers |= KING_ATTACKS[square] & boards[base + KING]
+        queens = boards[base + QUEEN]
+        attackers |= rook_attacks(square, occupied) & (boards[base + ROOK] | queens)
+        attackers |= bishop_attacks(square, occupied) & (boards[base + BISHOP] | queens)
+        return attackers
+
+    def check_and_pin_masks(self, color_index, king_square):
+        """The function finds the squares that answer a check and the pinned pieces of a player,
+        so moves other than king moves and en passant need no make/unmake to be checked.
+        Inputs:
+                - color_index: 0 for white, 1 for black
+                - king_square: integer
+        Output:
+                - check_mask: integer bitboard of the squares a piece other than the king must
+                  move to: every square when not in check, 0 in double check
+                - pins: dictionary {pinned square: bitboard of the line the piece may move along}"""
+        enemy_base = (1 - color_index) * 6
+        boards = self.bitboards
+        own = self.occupancy[color_index]
+        occupied = self.occupied
+        queens = boards[enemy_base + QUEEN]
+        rook_sliders = boards[enemy_base + ROOK] | queens
+        bishop_sliders = boards[enemy_base + BISHOP] | queens
+
+        checkers = self.attackers_of(king_square, 1 - color_index)
+        if not checkers:
+            check_mask = FULL_MASK
+        elif checkers & (checkers - 1):
+            check_mask = 0
+        else:
+            check_mask = checkers
+
+        pins = {}
+        for rays, positive, rook_line in RAY_DIRECTIONS:
+            ray = rays[king_square]
+            sliders = rook_sliders if rook_line else bishop_sliders
+            blockers = ray & occupied
+            # Nothing can check or pin along a ray without an enemy slider on it.
+            if not ray & sliders or not blockers:
+                continue
+            first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            if sliders >> first & 1:
+                # The squares between a single sliding checker and the king block the check.
+                if checkers == 1 << first:
+                    check_mask |= ray ^ rays[first]
+                continue
+            if not own >> first & 1:
+                continue
+            beyond = rays[first] & occupied
+            if not beyond:
+                continue
+            second = (beyond & -beyond).bit_length() - 1 if positive else beyond.bit_length() - 1
+            if sliders >> second & 1:
+                pins[first] = ray ^ rays[second]
+        return check_mask, pins
+
+    def is_square_attacked(self, square, by_color_index):
+        """The function checks if any piece of a player attacks a square."""
+        if square < 0:
+            return False
+        return bool(self.attackers_of(square, by_color_index))
+
+    def is_king_in_check(self, color):
+        """The function checks if the king is in check in a position.
+        Inputs:
+                - color: string
+        Output:
+                - condition: boolean
+                - threats: list"""
+        color_index = COLORS.index(color)
+        king_square = self.king_square(color_index)
+        if king_square < 0:
+            return False, []
+
+        threats = []
+        for square in iterate_bits(self.attackers_of(king_square, 1 - color_index)):
+            position = divmod(square, 8)
+            threats.append((self.get_piece(position), position))
+        return bool(threats), threats
+
+    def generate_legal_moves(self, color=None):
+        """The function generates every legal move of a player. Check and pin masks restrict
+        the moves of the pieces, king moves are checked against the attacks on their end
+        square, and only en passant captures are tried on the board.
+        Inputs:
+                - color: string, defaults to the side to move
+        Output:
+                - moves: list of (start, end, promotion) tuples"""
+        if color is None:
+            color = self.turn
+        color_index = COLORS.index(color)
+        enemy_index = 1 - color_index
+        base = color_index * 6
+        boards = self.bitboards
+        positions = SQUARE_POSITIONS
+        king_square = self.king_square(color_index)
+        if king_square < 0:
+            check_mask, pins = FULL_MASK, {}
+        else:
+            check_mask, pins = self.check_and_pin_masks(color_index, king_square)
+        en_passant_bit = 1 << self.en_passant if self.en_passant >= 0 and color == self.turn else 0
+        promotion_row = PROMOTION_ROWS[color_index]
+        moves = []
+        append = moves.append
+
+        # Only the king can move in double check.
+        if check_mask:
+            own = self.occupancy[color_index]
+            enemy = self.occupancy[enemy_index]
+            empty = ~self.occupied & FULL_MASK
+            pawns = boards[base + PAWN]
+            pinned = 0
+            for square in pins:
+                pinned |= 1 << square
+
+            # Pawns that are not pinned move all at once: each target is shifted back to its start.
+            free_pawns = pawns & ~pinned
+            if color_index == 0:
+                pushes = (free_pawns >> 8) & empty
+                double_pushes = ((pushes & (0xFF << 40)) >> 8) & empty
+                pawn_targets = [
+                    (pushes & check_mask, 8),
+                    (double_pushes & check_mask, 16),
+                    (((free_pawns & ~FILE_A) >> 9) & enemy & check_mask, 9),
+                    (((free_pawns & ~FILE_H) >> 7) & enemy & check_mask, 7),
+                ]
+            else:
+                pushes = (free_pawns << 8) & empty
+                double_pushes = ((pushes & (0xFF << 16)) << 8) & empty
+                pawn_targets = [
+                    (pushes & check_mask, -8),
+                    (double_pushes & check_mask, -16),
+                    (((free_pawns & ~FILE_H) << 9) & enemy & check_mask, -9),
+                    (((free_pawns & ~FILE_A) << 7) & enemy & check_mask, -7),
+                ]
+            for targets, shift in pawn_targets:
+                for end in iterate_bits(targets):
+                    start_position, end_position = positions[end + shift], positions[end]
+                    if promotion_row >> end & 1:
+                        for promotion in PROMOTION_PIECES:
+                            append((start_position, end_position, promotion))
+                    else:
+                        append((start_position, end_position, None))
+            for start in iterate_bits(pawns & pinned):
+                start_position = positions[start]
+                targets = self.piece_moves(base + PAWN, start) & check_mask & pins[start] & ~en_passant_bit
+                for end in iterate_bits(targets):
+                    if promotion_row >> end & 1:
+                        for promotion in PROMOTION_PIECES:
+                            append((start_position, positions[end], promotion))
+                    else:
+                        append((start_position, positions[end], None))
+            if en_passant_bit:
+                # The captured pawn leaves its square too, which can uncover a check.
+                for start in iterate_bits(PAWN_ATTACKS[enemy_index][self.en_passant] & pawns):
+                    move = (positions[start], positions[self.en_passant], None)
+                    undo = self.make_move(move)
+                    if not self.is_square_attacked(king_square, enemy_index):
+                        append(move)
+                    self.unmake_move(undo)
+
+            # A pinned knight can never stay on the line of the pin.
+            for start in iterate_bits(boards[base + KNIGHT] & ~pinned):
+                start_position = positions[start]
+                for end in iterate_bits(KNIGHT_ATTACKS[start] & ~own & check_mask):
+                    append((start_position, positions[end], None))
+            for index in range(base + BISHOP, base + KING):
+                for start in iterate_bits(boards[index]):
+                    start_position = positions[start]
+                    targets = self.piece_moves(index, start) & check_mask
+                    if start in pins:
+                        targets &= pins[start]
+                    for end in iterate_bits(targets):
+                        append((start_position, positions[end], None))
+
+        if king_square >= 0:
+            # The king no longer blocks the attackers it moves away from.
+            start_position = positions[king_square]
+            occupied = self.occupied ^ (1 << king_square)
+            for end in iterate_bits(KING_ATTACKS[king_square] & ~self.occupancy[color_index]):
+                if not self.attackers_of(end, enemy_index, occupied):
+                    append((start_position, positions[end], None))
+            if check_mask == FULL_MASK:
+                moves.extend(self.castling_moves(color_index))
+        return moves
+
+    def perft(self, depth):
+        """The function counts the leaf nodes of the legal move tree to a fixed depth, see ChessBoard.perft_nodes."""
+        return perft_nodes(self, depth)
+
+    def perft_divide(self, depth):
+        """The function counts the perft nodes below each legal move, see ChessBoard.perft_divide_nodes."""
+        return perft_divide_nodes(self, depth)
+
+    def has_legal_moves(self, color):
+        """The function checks if a player has at least one legal move."""
+        return bool(self.generate_legal_moves(color))
+
+    def check_game_status(self, color, tablebase=None):
+        """The function checks if the game ended by checkmate or stalemate for a player, see ChessBoard.game_status."""
+        return game_status(self, color, tablebase)
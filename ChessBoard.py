@@ -1,29 +1,408 @@
-import pygame
-import copy
+import random
 from ChessPieces import ChessPieces
+from ChessEvaluation import MIDGAME_SCORES, ENDGAME_SCORES, PHASE_WEIGHTS, compute_scores
 
-# Declare constants for screen dimensions.
-SCREEN_WIDTH = 600
-SCREEN_HEIGHT = 600
-
-# Define the size of the chessboard and its tiles.
+# Define the size of the chessboard. Screen sizes and colors are in ChessRenderer.
 BOARD_ROWS = 8
 BOARD_COLUMNS = 8
-SQUARE_SIZE = SCREEN_WIDTH // BOARD_COLUMNS
 
-# Define constants for RGB colors.
-black = (0, 0, 0)
-white = (255, 255, 255)
-gray = (128, 128, 128)
-brown = (139, 69, 19)
+# Define the movement patterns used by the move generator as (row, col) steps.
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ROOK_DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+BISHOP_DIRECTIONS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+PROMOTION_PIECES = ["queen", "rook", "bishop", "knight"]
+
+# Define the castling rights as bit flags.
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING_RIGHTS = 15
+
+# Castling rights lost when a piece moves from or to one of these squares.
+CASTLING_LOSSES = {
+    (7, 4): WHITE_KINGSIDE | WHITE_QUEENSIDE,
+    (7, 7): WHITE_KINGSIDE,
+    (7, 0): WHITE_QUEENSIDE,
+    (0, 4): BLACK_KINGSIDE | BLACK_QUEENSIDE,
+    (0, 7): BLACK_KINGSIDE,
+    (0, 0): BLACK_QUEENSIDE,
+}
+
+# Home squares of the king and rook needed by each castling right.
+CASTLING_HOMES = {
+    WHITE_KINGSIDE: ("white", (7, 4), (7, 7)),
+    WHITE_QUEENSIDE: ("white", (7, 4), (7, 0)),
+    BLACK_KINGSIDE: ("black", (0, 4), (0, 7)),
+    BLACK_QUEENSIDE: ("black", (0, 4), (0, 0)),
+}
+
+
+def _build_zobrist_keys():
+    """The function creates the random 64-bit keys used to hash positions.
+    A fixed seed keeps the hashes identical between runs so they can be stored on disk.
+    Output:
+            - piece_keys: dictionary {(piece_type, color): list of 64 keys indexed by row * 8 + col}
+            - black_to_move_key: integer
+            - castling_keys: list of 16 keys, one per combination of castling rights
+            - en_passant_keys: list of 8 keys, one per column"""
+    generator = random.Random(20250101)
+    piece_keys = {}
+    for color in ("white", "black"):
+        for piece_type in ("pawn", "knight", "bishop", "rook", "queen", "king"):
+            piece_keys[(piece_type, color)] = [generator.getrandbits(64) for _ in range(64)]
+    black_to_move_key = generator.getrandbits(64)
+    castling_keys = [generator.getrandbits(64) for _ in range(16)]
+    en_passant_keys = [generator.getrandbits(64) for _ in range(8)]
+    return piece_keys, black_to_move_key, castling_keys, en_passant_keys
+
+
+# Define the letters used by FEN and move notation.
+FEN_PIECES = {
+    "p": "pawn",
+    "n": "knight",
+    "b": "bishop",
+    "r": "rook",
+    "q": "queen",
+    "k": "king",
+}
+PIECE_LETTERS = {piece_type: letter for letter, piece_type in FEN_PIECES.items()}
+# Lookup tables so FEN parsing and writing need no string tests per character.
+FEN_SYMBOLS = {letter: (piece_type, "black") for letter, piece_type in FEN_PIECES.items()}
+FEN_SYMBOLS.update(
+    {letter.upper(): (piece_type, "white") for letter, piece_type in FEN_PIECES.items()}
+)
+FEN_LETTERS = {symbol: letter for letter, symbol in FEN_SYMBOLS.items()}
+FEN_EMPTY_SQUARES = {str(count): count for count in range(1, 9)}
+FEN_CASTLING = {"K": 1, "Q": 2, "k": 4, "q": 8, "-": 0}
+COLUMN_NAMES = "abcdefgh"
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+
+def square_name(position):
+    """The function converts a board position to algebraic notation.
+    Inputs:
+            - position: (row, col)
+    Output:
+            - name: string such as e4"""
+    return COLUMN_NAMES[position[1]] + str(BOARD_ROWS - position[0])
+
+
+def parse_square(name):
+    """The function converts algebraic notation to a board position.
+    Inputs:
+            - name: string such as e4
+    Output:
+            - position: (row, col)"""
+    return (BOARD_ROWS - int(name[1]), COLUMN_NAMES.index(name[0]))
+
+
+def move_to_uci(move):
+    """The function converts a move to long algebraic notation.
+    Inputs:
+            - move: (start, end, promotion) tuple
+    Output:
+            - notation: string such as e2e4 or e7e8q"""
+    start, end, promotion = move
+    notation = square_name(start) + square_name(end)
+    if promotion is not None:
+        notation += PIECE_LETTERS[promotion]
+    return notation
+
+
+def encode_move(move):
+    """The function packs a move into a 15-bit integer for compact storage.
+    Inputs:
+            - move: (start, end, promotion) tuple
+    Output:
+            - code: integer, start square, end square and promotion piece"""
+    start, end, promotion = move
+    code = (start[0] * 8 + start[1]) | (end[0] * 8 + end[1]) << 6
+    if promotion is not None:
+        code |= (PROMOTION_PIECES.index(promotion) + 1) << 12
+    return code
+
+
+def decode_move(code):
+    """The function unpacks a move created by encode_move.
+    Inputs:
+            - code: integer
+    Output:
+            - move: (start, end, promotion) tuple"""
+    promotion_index = code >> 12
+    return (
+        divmod(code & 63, 8),
+        divmod((code >> 6) & 63, 8),
+        PROMOTION_PIECES[promotion_index - 1] if promotion_index else None,
+    )
+
+
+(
+    ZOBRIST_PIECES,
+    ZOBRIST_BLACK_TO_MOVE,
+    ZOBRIST_CASTLING,
+    ZOBRIST_EN_PASSANT,
+) = _build_zobrist_keys()
+
+
+
+def _is_home_rook(piece, color):
+    """The function checks that a corner square holds a rook of the castling player.
+    Inputs:
+            - piece: ChessPieces or None
+            - color: string
+    Output:
+            - boolean"""
+    return piece is not None and piece.piece_type == "rook" and piece.color == color
+
+
+def perft_nodes(board, depth):
+    """The function counts the leaf nodes of the legal move tree to a fixed depth.
+    It only uses the shared board interface, so it runs on ChessBoard and BitBoard.
+    Inputs:
+            - board: ChessBoard or BitBoard
+            - depth: integer
+    Output:
+            - nodes: integer"""
+    if depth == 0:
+        return 1
+    moves = board.generate_legal_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        undo = board.make_move(move)
+        nodes += perft_nodes(board, depth - 1)
+        board.unmake_move(undo)
+    return nodes
+
+
+def perft_divide_nodes(board, depth):
+    """The function counts the perft nodes below each legal move of the side to move.
+    Inputs:
+            - board: ChessBoard or BitBoard
+            - depth: integer, at least 1
+    Output:
+            - counts: dictionary {move notation: nodes}"""
+    counts = {}
+    for move in board.generate_legal_moves():
+        undo = board.make_move(move)
+        counts[move_to_uci(move)] = perft_nodes(board, depth - 1)
+        board.unmake_move(undo)
+    return counts
+
+
+def game_status(board, color, tablebase=None):
+    """The function checks if the game ended by checkmate or stalemate for a player.
+    When an endgame tablebase covers the position, the exact result is reported.
+    Inputs:
+            - board: ChessBoard or BitBoard
+            - color: string
+            - tablebase: EndgameTablebase.Tablebase or None
+    Output:
+            - status: string"""
+    if board.has_legal_moves(color):
+        if tablebase is not None and color == board.turn:
+            result = tablebase.probe(board)
+            if result is not None:
+                outcome, plies = result
+                if outcome == "draw":
+                    return "Tablebase draw"
+                return "Tablebase %s in %d plies" % (outcome, plies)
+        return "Continue playing"
+    in_check, _ = board.is_king_in_check(color)
+    if in_check:
+        return "Checkmate"
+    return "Stalemate"
 
 
 class ChessBoard:
 
-    def __init__(self):
-        """The function initializes a 8x8 board array with chess pieces."""
+    def __init__(self, fen=None):
+        """The function initializes a 8x8 board array with chess pieces.
+        Inputs:
+                - fen: optional FEN string of the position, the starting position by default"""
         self.board = [[None for _ in range(8)] for _ in range(8)]
-        self.create_pieces()
+        # Track the pieces of each player and their king squares as moves are made.
+        self.pieces = {"white": [], "black": []}
+        self.king_positions = {"white": None, "black": None}
+        # Game state that is not visible in the board array.
+        self.turn = "white"
+        self.castling_rights = ALL_CASTLING_RIGHTS
+        self.en_passant = None  # Square a pawn skipped with a double step, if any
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.undo_stack = []  # Undo records of the moves played with move_piece
+        self.hash = 0  # Zobrist key of the position, updated by make_move and unmake_move
+        # Material and piece-square scores from white's point of view, see ChessEvaluation.
+        self.midgame_score = 0
+        self.endgame_score = 0
+        self.phase = 0
+        if fen is None:
+            self.create_pieces()
+        else:
+            self.load_fen(fen)
+
+    @classmethod
+    def from_fen(cls, fen):
+        """The function creates a board from a FEN string.
+        Inputs:
+                - fen: string
+        Output:
+                - board: ChessBoard"""
+        return cls(fen)
+
+    def load_fen(self, fen):
+        """The function sets the board to the position described by a FEN string.
+        The piece lists, Zobrist key and evaluation scores are built in the same pass.
+        Inputs:
+                - fen: string"""
+        fields = fen.split()
+        if not fields:
+            raise ValueError("Empty FEN string")
+        board = [[None] * 8 for _ in range(8)]
+        pieces = {"white": [], "black": []}
+        king_positions = {"white": None, "black": None}
+        key = 0
+        midgame_score = 0
+        endgame_score = 0
+        phase = 0
+
+        row = 0
+        column = 0
+        board_row = board[0]
+        for letter in fields[0]:
+            empty_squares = FEN_EMPTY_SQUARES.get(letter)
+            if empty_squares is not None:
+                column += empty_squares
+                if column > 8:
+                    raise ValueError("Too many squares in a FEN rank: %s" % fen)
+            elif letter == "/":
+                if column != 8:
+                    raise ValueError("A FEN rank must have 8 squares: %s" % fen)
+                row += 1
+                column = 0
+                if row > 7:
+                    raise ValueError("Too many rows in FEN: %s" % fen)
+                board_row = board[row]
+            else:
+                symbol = FEN_SYMBOLS.get(letter)
+                if symbol is None or column > 7:
+                    raise ValueError("Invalid piece placement in FEN: %s" % fen)
+                piece_type, color = symbol
+                piece = ChessPieces(piece_type, color, (row, column))
+                board_row[column] = piece
+                pieces[color].append(piece)
+                square = row * 8 + column
+                key ^= ZOBRIST_PIECES[symbol][square]
+                midgame_score += MIDGAME_SCORES[symbol][square]
+                endgame_score += ENDGAME_SCORES[symbol][square]
+                phase += PHASE_WEIGHTS[piece_type]
+                if piece_type == "king":
+                    king_positions[color] = (row, column)
+                column += 1
+
+        if row != 7 or column != 8:
+            raise ValueError("A FEN placement must have 8 ranks of 8 squares: %s" % fen)
+
+        if len(fields) > 1 and fields[1] not in ("w", "b"):
+            raise ValueError("Invalid side to move in FEN: %s" % fen)
+        turn = "black" if len(fields) > 1 and fields[1] == "b" else "white"
+        castling_rights = 0
+        if len(fields) > 2:
+            for letter in fields[2]:
+                if letter not in FEN_CASTLING:
+                    raise ValueError("Invalid castling rights in FEN: %s" % fen)
+                castling_rights |= FEN_CASTLING[letter]
+        # Every right needs its king and rook on their home squares, otherwise castling would move a missing rook.
+        for right, (color, king_square, rook_square) in CASTLING_HOMES.items():
+            if not castling_rights & right:
+                continue
+            king = board[king_square[0]][king_square[1]]
+            rook = board[rook_square[0]][rook_square[1]]
+            if (
+                king is None
+                or king.piece_type != "king"
+                or king.color != color
+                or rook is None
+                or rook.piece_type != "rook"
+                or rook.color != color
+            ):
+                raise ValueError("Castling rights without king and rook at home in FEN: %s" % fen)
+        en_passant = None
+        if len(fields) > 3 and fields[3] != "-":
+            square = fields[3]
+            # The target lies behind a pawn of the opponent that has just advanced two squares.
+            target_rank, pawn_step, pawn_color = ("6", 1, "black") if turn == "white" else ("3", -1, "white")
+            if len(square) != 2 or square[0] not in COLUMN_NAMES or square[1] != target_rank:
+                raise ValueError("Invalid en passant square in FEN: %s" % fen)
+            en_passant = parse_square(square)
+            pawn = board[en_passant[0] + pawn_step][en_passant[1]]
+            if (
+                board[en_passant[0]][en_passant[1]] is not None
+                or pawn is None
+                or pawn.piece_type != "pawn"
+                or pawn.color != pawn_color
+            ):
+                raise ValueError("En passant square without a pawn to capture in FEN: %s" % fen)
+        try:
+            halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise ValueError("Invalid move counters in FEN: %s" % fen) from None
+
+        if turn == "black":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        key ^= ZOBRIST_CASTLING[castling_rights]
+        if en_passant is not None:
+            key ^= ZOBRIST_EN_PASSANT[en_passant[1]]
+
+        self.board = board
+        self.pieces = pieces
+        self.king_positions = king_positions
+        self.turn = turn
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.undo_stack = []
+        self.hash = key
+        self.midgame_score = midgame_score
+        self.endgame_score = endgame_score
+        self.phase = phase
+
+    def to_fen(self):
+        """The function describes the position as a FEN string.
+        Output:
+                - fen: string"""
+        rows = []
+        for board_row in self.board:
+            row_text = ""
+            empty_squares = 0
+            for piece in board_row:
+                if piece is None:
+                    empty_squares += 1
+                else:
+                    if empty_squares:
+                        row_text += str(empty_squares)
+                        empty_squares = 0
+                    row_text += FEN_LETTERS[(piece.piece_type, piece.color)]
+            if empty_squares:
+                row_text += str(empty_squares)
+            rows.append(row_text)
+
+        castling = "".join(
+            letter for letter, right in FEN_CASTLING.items() if right & self.castling_rights
+        )
+        return "%s %s %s %s %d %d" % (
+            "/".join(rows),
+            "w" if self.turn == "white" else "b",
+            castling or "-",
+            square_name(self.en_passant) if self.en_passant is not None else "-",
+            self.halfmove_clock,
+            self.fullmove_number,
+        )
 
     def create_pieces(self):
         """The function places the pieces for both players on the board."""
@@ -48,26 +427,53 @@ class ChessBoard:
             self.board[0][i] = ChessPieces(piece, "black", (0, i))
             self.board[7][i] = ChessPieces(piece, "white", (7, i))
 
-    def draw(self, screen):
-        """The function draws the chessboard and pieces on the screen."""
-        # Draw board tiles.
-        for row in range(BOARD_ROWS):
-            for column in range(BOARD_COLUMNS):
-                if (row + column) % 2 == 0:
-                    color = gray
-                else:
-                    color = brown
-                pygame.draw.rect(
-                    screen,
-                    color,
-                    (column * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE),
-                )
-        # Draw chess pieces.
+        self.index_pieces()
+
+    def index_pieces(self):
+        """The function rebuilds the piece lists and king positions from the board array."""
+        self.pieces = {"white": [], "black": []}
+        self.king_positions = {"white": None, "black": None}
         for row in range(BOARD_ROWS):
             for column in range(BOARD_COLUMNS):
                 piece = self.board[row][column]
                 if piece is not None:
-                    piece.draw(screen)
+                    self.pieces[piece.color].append(piece)
+                    if piece.piece_type == "king":
+                        self.king_positions[piece.color] = (row, column)
+        self.hash = self.compute_hash()
+        self.midgame_score, self.endgame_score, self.phase = compute_scores(self)
+
+    def compute_hash(self):
+        """The function computes the Zobrist key of the position from scratch.
+        Output:
+                - key: 64-bit integer"""
+        key = 0
+        for color in ("white", "black"):
+            for piece in self.pieces[color]:
+                row, column = piece.pos
+                key ^= ZOBRIST_PIECES[(piece.piece_type, color)][row * 8 + column]
+        if self.turn == "black":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        key ^= ZOBRIST_CASTLING[self.castling_rights]
+        if self.en_passant is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant[1]]
+        return key
+
+    def draw(self, screen):
+        """The function draws the chessboard and pieces on the screen, see ChessRenderer.draw_board."""
+        # pygame is only needed to draw, so the renderer is imported on demand.
+        from ChessRenderer import draw_board
+
+        draw_board(screen, self)
+
+    def to_planes(self):
+        """The function encodes the position as NumPy planes, see ChessTensors.
+        Output:
+                - planes: uint8 array of shape (18, 8, 8)"""
+        # NumPy is only needed for tensor exports, so it is imported on demand.
+        from ChessTensors import board_to_planes
+
+        return board_to_planes(self)
 
     def get_piece(self, position):
         """The function returns the piece given the position coordinates.
@@ -75,40 +481,192 @@ class ChessBoard:
         Outputs:chess piece"""
         return self.board[position[0]][position[1]]
 
-    def move_piece(self, start_position, end_position, screen):
+    def move_piece(self, start_position, end_position, screen, promotion="queen"):
         """The function moves a chess piece.
         Inputs:
                 - start_position: (row, col)
                 - end_position: (row, col)
                 - screen
+                - promotion: string, piece type a pawn promotes to
         Output:
                 - condition: boolean"""
 
         # Get the piece.
-        start_row, start_col = start_position
-        end_row, end_col = end_position
         moving_piece = self.get_piece(start_position)
+        if moving_piece is None:
+            return False
 
-        # Check if the move is valid and if it is update the piece position.
-        if self.validate_move(moving_piece, start_position, end_position):
-            self.board[end_row][end_col] = moving_piece
-            self.board[start_row][start_col] = None
-            moving_piece.pos = end_position
-
-            # Update the game state, including checking for checks
-            _, threats = self.is_king_in_check(moving_piece.color)
-            if threats:
-                # Move results in a check against the moving player; undo the move
-                self.board[end_row][end_col] = None
-                self.board[start_row][start_col] = moving_piece
-                moving_piece.pos = start_position
-                return False
+        # Play the move if it is one of the legal moves.
+        for move in self.generate_legal_moves(moving_piece.color):
+            if move[0] == start_position and move[1] == end_position:
+                if move[2] is None or move[2] == promotion:
+                    self.undo_stack.append(self.make_move(move))
+                    if screen is not None:
+                        self.draw(screen)
+                    return True
 
-            self.draw(screen)
-            return True
+        return False
+
+    def make_move(self, move):
+        """The function plays a move in place, including castling, en passant and promotion.
+        Inputs:
+                - move: (start, end, promotion) tuple
+        Output:
+                - undo: record to pass to unmake_move"""
+        start, end, promotion = move
+        board = self.board
+        moving_piece = board[start[0]][start[1]]
+        color = moving_piece.color
+
+        # An en passant capture removes the pawn beside the destination square.
+        captured_position = end
+        if moving_piece.piece_type == "pawn" and end == self.en_passant:
+            captured_position = (start[0], end[1])
+        captured_piece = board[captured_position[0]][captured_position[1]]
 
+        undo = (
+            move,
+            captured_piece,
+            captured_position,
+            self.castling_rights,
+            self.en_passant,
+            self.halfmove_clock,
+            self.midgame_score,
+            self.endgame_score,
+            self.phase,
+            self.hash,
+        )
+
+        # Update the Zobrist key and the evaluation scores of the pieces that change square.
+        start_square = start[0] * 8 + start[1]
+        end_square = end[0] * 8 + end[1]
+        piece_key = (moving_piece.piece_type, color)
+        key = self.hash ^ ZOBRIST_PIECES[piece_key][start_square]
+        midgame_score = self.midgame_score - MIDGAME_SCORES[piece_key][start_square]
+        endgame_score = self.endgame_score - ENDGAME_SCORES[piece_key][start_square]
+        if captured_piece is not None:
+            board[captured_position[0]][captured_position[1]] = None
+            self.pieces[captured_piece.color].remove(captured_piece)
+            captured_key = (captured_piece.piece_type, captured_piece.color)
+            captured_square = captured_position[0] * 8 + captured_position[1]
+            key ^= ZOBRIST_PIECES[captured_key][captured_square]
+            midgame_score -= MIDGAME_SCORES[captured_key][captured_square]
+            endgame_score -= ENDGAME_SCORES[captured_key][captured_square]
+            self.phase -= PHASE_WEIGHTS[captured_piece.piece_type]
+        board[end[0]][end[1]] = moving_piece
+        board[start[0]][start[1]] = None
+        moving_piece.pos = end
+        if promotion is not None:
+            moving_piece.piece_type = promotion
+            piece_key = (promotion, color)
+            self.phase += PHASE_WEIGHTS[promotion]
+        key ^= ZOBRIST_PIECES[piece_key][end_square]
+        midgame_score += MIDGAME_SCORES[piece_key][end_square]
+        endgame_score += ENDGAME_SCORES[piece_key][end_square]
+
+        if self.en_passant is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant[1]]
+        self.en_passant = None
+        if moving_piece.piece_type == "king":
+            self.king_positions[color] = end
+            # Castling also moves the rook to the other side of the king.
+            if abs(end[1] - start[1]) == 2:
+                rook_start, rook_end = self._castling_rook_squares(start, end)
+                rook = board[rook_start[0]][rook_start[1]]
+                board[rook_end[0]][rook_end[1]] = rook
+                board[rook_start[0]][rook_start[1]] = None
+                rook.pos = rook_end
+                rook_start_square = rook_start[0] * 8 + rook_start[1]
+                rook_end_square = rook_end[0] * 8 + rook_end[1]
+                rook_key = ("rook", color)
+                key ^= ZOBRIST_PIECES[rook_key][rook_start_square]
+                key ^= ZOBRIST_PIECES[rook_key][rook_end_square]
+                midgame_score += (
+                    MIDGAME_SCORES[rook_key][rook_end_square]
+                    - MIDGAME_SCORES[rook_key][rook_start_square]
+                )
+                endgame_score += (
+                    ENDGAME_SCORES[rook_key][rook_end_square]
+                    - ENDGAME_SCORES[rook_key][rook_start_square]
+                )
+        elif moving_piece.piece_type == "pawn" and abs(end[0] - start[0]) == 2:
+            self.en_passant = ((start[0] + end[0]) // 2, start[1])
+            key ^= ZOBRIST_EN_PASSANT[start[1]]
+
+        key ^= ZOBRIST_CASTLING[self.castling_rights]
+        self.castling_rights &= ~(
+            CASTLING_LOSSES.get(start, 0) | CASTLING_LOSSES.get(end, 0)
+        )
+        self.hash = key ^ ZOBRIST_CASTLING[self.castling_rights] ^ ZOBRIST_BLACK_TO_MOVE
+        self.midgame_score = midgame_score
+        self.endgame_score = endgame_score
+        if captured_piece is not None or promotion is not None or moving_piece.piece_type == "pawn":
+            self.halfmove_clock = 0
         else:
-            return False
+            self.halfmove_clock += 1
+        if color == "black":
+            self.fullmove_number += 1
+        self.turn = "black" if color == "white" else "white"
+        return undo
+
+    def unmake_move(self, undo):
+        """The function takes back a move played with make_move.
+        Inputs:
+                - undo: record returned by make_move"""
+        (
+            move,
+            captured_piece,
+            captured_position,
+            castling_rights,
+            en_passant,
+            halfmove_clock,
+            self.midgame_score,
+            self.endgame_score,
+            self.phase,
+            self.hash,
+        ) = undo
+        start, end, promotion = move
+        board = self.board
+        moving_piece = board[end[0]][end[1]]
+        color = moving_piece.color
+
+        if promotion is not None:
+            moving_piece.piece_type = "pawn"
+        board[start[0]][start[1]] = moving_piece
+        board[end[0]][end[1]] = None
+        moving_piece.pos = start
+        if captured_piece is not None:
+            board[captured_position[0]][captured_position[1]] = captured_piece
+            self.pieces[captured_piece.color].append(captured_piece)
+
+        if moving_piece.piece_type == "king":
+            self.king_positions[color] = start
+            if abs(end[1] - start[1]) == 2:
+                rook_start, rook_end = self._castling_rook_squares(start, end)
+                rook = board[rook_end[0]][rook_end[1]]
+                board[rook_start[0]][rook_start[1]] = rook
+                board[rook_end[0]][rook_end[1]] = None
+                rook.pos = rook_start
+
+        self.castling_rights = castling_rights
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        if color == "black":
+            self.fullmove_number -= 1
+        self.turn = color
+
+    def _castling_rook_squares(self, king_start, king_end):
+        """The function returns the rook start and end squares of a castling move.
+        Inputs:
+                - king_start: (row, col)
+                - king_end: (row, col)
+        Output:
+                - rook_start: (row, col)
+                - rook_end: (row, col)"""
+        row = king_start[0]
+        if king_end[1] > king_start[1]:
+            return (row, 7), (row, 5)
+        return (row, 0), (row, 3)
 
     def validate_move(self, piece, start, end):
         """The function validates moves based on the type of piece.
@@ -281,6 +839,12 @@ class ChessBoard:
             cur_row += step_row
             cur_col += step_col
 
+        # Check the final position, if there is a piece, it must be capturable (different color)
+        destination_piece = self.get_piece((end_row, end_col))
+        if destination_piece:
+            if destination_piece.color == self.get_piece(start).color:
+                return False
+
         return True
 
     def validate_queen_move(self, start, end):
@@ -319,26 +883,16 @@ class ChessBoard:
             return False
 
         # Temporarily make the move on the actual board to check for threats
-        original_piece = self.board[end_row][end_col]
-        self.board[end_row][end_col] = moving_piece
-        self.board[start_row][start_col] = None
-        moving_piece.pos = (end_row, end_col)
-
-        # Check if this move puts the king in check using is_king_in_check
-        _, threats = self.is_king_in_check(moving_piece.color)
-        if threats:
-            # Undo the move because it results in check
-            self.board[end_row][end_col] = original_piece
-            self.board[start_row][start_col] = moving_piece
-            moving_piece.pos = start
-            return False
+        undo = self.make_move((start, end, None))
 
-        # Restore the board to its original state if no check is detected
-        self.board[end_row][end_col] = original_piece
-        self.board[start_row][start_col] = moving_piece
-        moving_piece.pos = start
+        # Check if the destination square is attacked once the king has left its square
+        opponent = "black" if moving_piece.color == "white" else "white"
+        attacked = self.is_square_attacked(end, opponent)
 
-        return True
+        # Restore the board to its original state
+        self.unmake_move(undo)
+
+        return not attacked
 
     def is_king_in_check(self, color):
         """The function checks if the king is in check in a position.
@@ -347,32 +901,86 @@ class ChessBoard:
         Output:
                 - condition: boolean
                 - threats: list"""
-        king_position = None
+        king_position = self.king_positions[color]
         threats = []  # List to store threats for more advanced handling like blocking
-        for row in range(8):
-            for col in range(8):
-                piece = self.get_piece((row, col))
-                if piece and piece.piece_type == "king" and piece.color == color:
-                    king_position = (row, col)
 
         if not king_position:
             return False, []  # If no king is found, return False and an empty list
 
-        for row in range(8):
-            for col in range(8):
-                attacker = self.get_piece((row, col))
-                if attacker and attacker.color != color:
-                    if self.validate_move(attacker, (row, col), king_position):
-                        threats.append(
-                            (attacker, (row, col))
-                        )  # Include the attacker and its position
+        opponent = "black" if color == "white" else "white"
+        threats = self.attackers_of(king_position, opponent)
         return (
             bool(threats),
             threats,
         )  # Return both the check status and details of the threats
 
+    def attackers_of(self, square, by_color, first_only=False):
+        """The function finds the pieces of a player attacking a square by looking outward
+        from the square along rays, knight jumps, pawn diagonals and king neighbours.
+        Inputs:
+                - square: (row, col)
+                - by_color: string
+                - first_only: boolean, stop at the first attacker found
+        Output:
+                - attackers: list of (piece, (row, col))"""
+        board = self.board
+        row, col = square
+        attackers = []
+
+        # A pawn attacks diagonally forward, so it stands one row behind the square.
+        pawn_row = row + 1 if by_color == "white" else row - 1
+        if 0 <= pawn_row < BOARD_ROWS:
+            for pawn_col in (col - 1, col + 1):
+                if 0 <= pawn_col < BOARD_COLUMNS:
+                    piece = board[pawn_row][pawn_col]
+                    if piece is not None and piece.color == by_color and piece.piece_type == "pawn":
+                        attackers.append((piece, (pawn_row, pawn_col)))
+                        if first_only:
+                            return attackers
+
+        # Knights and kings attack a fixed set of squares.
+        for offsets, piece_type in ((KNIGHT_OFFSETS, "knight"), (KING_OFFSETS, "king")):
+            for step_row, step_col in offsets:
+                cur_row, cur_col = row + step_row, col + step_col
+                if 0 <= cur_row < BOARD_ROWS and 0 <= cur_col < BOARD_COLUMNS:
+                    piece = board[cur_row][cur_col]
+                    if piece is not None and piece.color == by_color and piece.piece_type == piece_type:
+                        attackers.append((piece, (cur_row, cur_col)))
+                        if first_only:
+                            return attackers
+
+        # Sliding pieces attack along the ray until the first blocker.
+        for directions, sliders in (
+            (ROOK_DIRECTIONS, ("rook", "queen")),
+            (BISHOP_DIRECTIONS, ("bishop", "queen")),
+        ):
+            for step_row, step_col in directions:
+                cur_row, cur_col = row + step_row, col + step_col
+                while 0 <= cur_row < BOARD_ROWS and 0 <= cur_col < BOARD_COLUMNS:
+                    piece = board[cur_row][cur_col]
+                    if piece is not None:
+                        if piece.color == by_color and piece.piece_type in sliders:
+                            attackers.append((piece, (cur_row, cur_col)))
+                            if first_only:
+                                return attackers
+                        break
+                    cur_row += step_row
+                    cur_col += step_col
+
+        return attackers
+
+    def is_square_attacked(self, square, by_color):
+        """The function checks if any piece of a player attacks a square.
+        Inputs:
+                - square: (row, col)
+                - by_color: string
+        Output:
+                - condition: boolean"""
+        return bool(self.attackers_of(square, by_color, first_only=True))
+
     def resolve_check(self, color):
-        """The function checks if there ia a valid movement by a piece to stop a check.
+        """The function checks if there ia a valid movement by a piece to stop a check
+        by capturing the threatening piece.
         Inputs:
                 - color: RGB touple
         Output:
@@ -381,40 +989,236 @@ class ChessBoard:
         if not in_check:
             return False  # No need to resolve check if not in check
 
-        valid_responses = []
-        for threat in threats:
-            threat_piece, threat_pos = threat
-            # Check every piece of the current player to see if they can capture the threatening piece
-            for row in range(8):
-                for col in range(8):
-                    defender = self.get_piece((row, col))
-                    if defender and defender.color == color:
-                        if self.validate_move(defender, (row, col), threat_pos):
-                            # Simulate the capture
-                            simulated_board = copy.deepcopy(self.board)
-                            simulated_board[threat_pos[0]][threat_pos[1]] = defender
-                            simulated_board[row][col] = None
-                            # Check if the move resolves the check
-                            _, new_threats = simulated_board.is_king_in_check(color)
-                            if not new_threats:
-                                valid_responses.append(
-                                    (defender, (row, col), threat_pos)
-                                )
-
-        if valid_responses:
-            return True  # There are valid moves to capture the threatening piece
+        # The legal moves are already simulated in place with make_move and unmake_move.
+        threat_positions = [threat_pos for _, threat_pos in threats]
+        for move in self.generate_legal_moves(color):
+            if move[1] in threat_positions:
+                return True  # There are valid moves to capture the threatening piece
         return False
 
-    def check_game_status(self, color):
-        """The function checks if the king is in check in a position.
+    def generate_pseudo_legal_moves(self, color=None):
+        """The function generates every move that follows the movement pattern of the pieces,
+        without checking if the move leaves the own king in check.
         Inputs:
-                - color: RGB touple
+                - color: string, defaults to the side to move
         Output:
-                - condition: boolean"""
-        if self.is_king_in_check(color):
-            if not self.resolve_check(color):
-                return "Checkmate"
+                - moves: list of (start, end, promotion) tuples"""
+        if color is None:
+            color = self.turn
+        moves = []
+        for piece in self.pieces[color]:
+            self._add_piece_moves(piece, piece.pos, moves)
+        return moves
+
+    def _add_piece_moves(self, piece, start, moves):
+        """The function appends the pseudo legal moves of one piece to the move list.
+        Inputs:
+                - piece: ChessPieces class attribute
+                - start: (row, col)
+                - moves: list of (start, end, promotion) tuples"""
+        board = self.board
+        row, col = start
+        color = piece.color
+        piece_type = piece.piece_type
+
+        if piece_type == "pawn":
+            direction = -1 if color == "white" else 1
+            next_row = row + direction
+            if 0 <= next_row < BOARD_ROWS:
+                # Pawns reaching the last row promote to any of the promotion pieces.
+                promotions = PROMOTION_PIECES if next_row in (0, 7) else (None,)
+                # Straight moves, including the double step from the initial row.
+                if board[next_row][col] is None:
+                    for promotion in promotions:
+                        moves.append((start, (next_row, col), promotion))
+                    initial_row = 6 if color == "white" else 1
+                    if row == initial_row and board[row + 2 * direction][col] is None:
+                        moves.append((start, (row + 2 * direction, col), None))
+                # Diagonal captures, including en passant.
+                for next_col in (col - 1, col + 1):
+                    if 0 <= next_col < BOARD_COLUMNS:
+                        target = board[next_row][next_col]
+                        if target is not None and target.color != color:
+                            for promotion in promotions:
+                                moves.append((start, (next_row, next_col), promotion))
+                        elif (next_row, next_col) == self.en_passant:
+                            moves.append((start, (next_row, next_col), None))
+
+        elif piece_type == "knight" or piece_type == "king":
+            offsets = KNIGHT_OFFSETS if piece_type == "knight" else KING_OFFSETS
+            for step_row, step_col in offsets:
+                end_row, end_col = row + step_row, col + step_col
+                if 0 <= end_row < BOARD_ROWS and 0 <= end_col < BOARD_COLUMNS:
+                    target = board[end_row][end_col]
+                    if target is None or target.color != color:
+                        moves.append((start, (end_row, end_col), None))
+            if piece_type == "king":
+                self._add_castling_moves(start, color, moves)
+
         else:
-            if not self.has_legal_moves(color):
-                return "Stalemate"
-        return "Continue playing"
+            if piece_type == "rook":
+                directions = ROOK_DIRECTIONS
+            elif piece_type == "bishop":
+                directions = BISHOP_DIRECTIONS
+            else:
+                directions = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+            # Slide along each direction until the edge or the first piece.
+            for step_row, step_col in directions:
+                end_row, end_col = row + step_row, col + step_col
+                while 0 <= end_row < BOARD_ROWS and 0 <= end_col < BOARD_COLUMNS:
+                    target = board[end_row][end_col]
+                    if target is None:
+                        moves.append((start, (end_row, end_col), None))
+                    else:
+                        if target.color != color:
+                            moves.append((start, (end_row, end_col), None))
+                        break
+                    end_row += step_row
+                    end_col += step_col
+
+    def _add_castling_moves(self, start, color, moves):
+        """The function appends the castling moves whose rights remain, whose rook is home and whose path is empty.
+        The squares crossed by the king are checked for attacks by generate_legal_moves.
+        Inputs:
+                - start: (row, col) of the king
+                - color: string
+                - moves: list of (start, end, promotion) tuples"""
+        if color == "white":
+            row, kingside, queenside = 7, WHITE_KINGSIDE, WHITE_QUEENSIDE
+        else:
+            row, kingside, queenside = 0, BLACK_KINGSIDE, BLACK_QUEENSIDE
+        if start != (row, 4):
+            return
+        board_row = self.board[row]
+        if (
+            self.castling_rights & kingside
+            and _is_home_rook(board_row[7], color)
+            and board_row[5] is None
+            and board_row[6] is None
+        ):
+            moves.append((start, (row, 6), None))
+        if (
+            self.castling_rights & queenside
+            and _is_home_rook(board_row[0], color)
+            and board_row[1] is None
+            and board_row[2] is None
+            and board_row[3] is None
+        ):
+            moves.append((start, (row, 2), None))
+
+    def find_pins(self, color, king_position):
+        """The function finds the pieces of a player that are pinned to their king.
+        Inputs:
+                - color: string
+                - king_position: (row, col)
+        Output:
+                - pins: dictionary {(row, col): (step_row, step_col)} with the pin direction"""
+        pins = {}
+        king_row, king_col = king_position
+        for step_row, step_col in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            sliders = ("rook", "queen") if step_row == 0 or step_col == 0 else ("bishop", "queen")
+            shield = None
+            cur_row, cur_col = king_row + step_row, king_col + step_col
+            while 0 <= cur_row < BOARD_ROWS and 0 <= cur_col < BOARD_COLUMNS:
+                piece = self.board[cur_row][cur_col]
+                if piece is not None:
+                    if piece.color == color:
+                        if shield is not None:
+                            break  # Two own pieces on the ray, nothing is pinned.
+                        shield = (cur_row, cur_col)
+                    else:
+                        if shield is not None and piece.piece_type in sliders:
+                            pins[shield] = (step_row, step_col)
+                        break
+                cur_row += step_row
+                cur_col += step_col
+        return pins
+
+    def generate_legal_moves(self, color=None, captures_only=False):
+        """The function generates every legal move of a player.
+        Inputs:
+                - color: string, defaults to the side to move
+                - captures_only: boolean, keep only captures and promotions
+        Output:
+                - moves: list of (start, end, promotion) tuples"""
+        if color is None:
+            color = self.turn
+        king_position = self.king_positions[color]
+        pseudo_moves = self.generate_pseudo_legal_moves(color)
+        if captures_only:
+            pseudo_moves = [move for move in pseudo_moves if self.is_capture(move)]
+        if king_position is None:
+            return pseudo_moves
+
+        opponent = "black" if color == "white" else "white"
+        in_check = self.is_square_attacked(king_position, opponent)
+        pins = {} if in_check else self.find_pins(color, king_position)
+
+        legal_moves = []
+        for move in pseudo_moves:
+            start, end = move[0], move[1]
+            if start == king_position and abs(end[1] - start[1]) == 2:
+                # The king may not castle out of or through an attacked square.
+                crossed_square = (start[0], (start[1] + end[1]) // 2)
+                if in_check or self.is_square_attacked(crossed_square, opponent):
+                    continue
+                if not self._leaves_king_in_check(move, color):
+                    legal_moves.append(move)
+            elif in_check or start == king_position or end == self.en_passant:
+                # King moves, check evasions and en passant captures are verified on the board.
+                if not self._leaves_king_in_check(move, color):
+                    legal_moves.append(move)
+            elif start in pins:
+                # A pinned piece may only move along the line of the pin.
+                step_row, step_col = pins[start]
+                delta_row = end[0] - king_position[0]
+                delta_col = end[1] - king_position[1]
+                if delta_row * step_col == delta_col * step_row:
+                    legal_moves.append(move)
+            else:
+                legal_moves.append(move)
+        return legal_moves
+
+    def is_capture(self, move):
+        """The function checks if a move captures a piece or promotes a pawn.
+        Inputs:
+                - move: (start, end, promotion) tuple
+        Output:
+                - condition: boolean"""
+        start, end, promotion = move
+        if promotion is not None or self.board[end[0]][end[1]] is not None:
+            return True
+        return end == self.en_passant and self.board[start[0]][start[1]].piece_type == "pawn"
+
+    def _leaves_king_in_check(self, move, color):
+        """The function simulates a move and checks if the own king is left in check.
+        Inputs:
+                - move: (start, end, promotion) tuple
+                - color: string
+        Output:
+                - condition: boolean"""
+        undo = self.make_move(move)
+        opponent = "black" if color == "white" else "white"
+        attacked = self.is_square_attacked(self.king_positions[color], opponent)
+        self.unmake_move(undo)
+        return attacked
+
+    def perft(self, depth):
+        """The function counts the leaf nodes of the legal move tree to a fixed depth, see perft_nodes."""
+        return perft_nodes(self, depth)
+
+    def perft_divide(self, depth):
+        """The function counts the perft nodes below each legal move, see perft_divide_nodes."""
+        return perft_divide_nodes(self, depth)
+
+    def has_legal_moves(self, color):
+        """The function checks if a player has at least one legal move.
+        Inputs:
+                - color: string
+        Output:
+                - condition: boolean"""
+        return bool(self.generate_legal_moves(color))
+
+    def check_game_status(self, color, tablebase=None):
+        """The function checks if the game ended by checkmate or stalemate for a player, see game_status."""
+        return game_status(self, color, tablebase)
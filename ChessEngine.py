@@ -0,0 +1,694 @@
+import threading
+import time
+
+from ChessBoard import ChessBoard, encode_move, decode_move
+import ChessEvaluation
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+# Define the material value of the pieces in centipawns, used for move ordering and pruning.
+PIECE_VALUES = {
+    "pawn": 100,
+    "knight": 320,
+    "bishop": 330,
+    "rook": 500,
+    "queen": 900,
+    "king": 0,
+}
+
+# Define the search score limits. Mate scores are reduced by the ply of the mate.
+MATE_SCORE = 100000
+INFINITY = 1000000
+MAX_PLY = 64
+# Tablebase entries are one byte, so a tablebase result adds at most 254 plies to mate.
+MAX_TABLEBASE_PLIES = 254
+# Scores at or beyond this bound are mates, found by the search or read from a tablebase.
+MATE_BOUND = MATE_SCORE - MAX_PLY - MAX_TABLEBASE_PLIES
+
+# Number of nodes searched between two checks of the clock.
+TIME_CHECK_INTERVAL = 1024
+# Seconds between two checks of the stop event while waiting for the worker processes.
+STOP_CHECK_SECONDS = 0.01
+
+# Define the move ordering scores: hash move, captures, killers, then quiet moves by history.
+HASH_MOVE_SCORE = 10000000
+CAPTURE_SCORE = 1000000
+PROMOTION_SCORE = 950000
+FIRST_KILLER_SCORE = 900000
+SECOND_KILLER_SCORE = 800000
+HISTORY_LIMIT = 700000
+
+# Delta pruning margins: a capture is skipped if even winning the piece plus the margin
+# cannot raise alpha, and the whole node is skipped if winning a queen cannot.
+DELTA_MARGIN = 200
+BIG_DELTA = PIECE_VALUES["queen"] + DELTA_MARGIN
+
+# Attacker values used by most valuable victim / least valuable attacker ordering.
+ATTACKER_RANKS = {"pawn": 1, "knight": 2, "bishop": 3, "rook": 4, "queen": 5, "king": 6}
+
+
+def score_to_table(score, ply):
+    """The function converts a mate score to be relative to the stored position."""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """The function converts a stored mate score back to be relative to the root."""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+def pick_next_move(moves, scores, index):
+    """The function moves the best scored remaining move to a position of the list,
+    so only the moves searched before a cutoff are ever sorted.
+    Inputs:
+            - moves: list of moves
+            - scores: list of integers
+            - index: integer position to fill
+    Output:
+            - move: the move now at the position"""
+    best = index
+    best_score = scores[index]
+    for candidate in range(index + 1, len(moves)):
+        if scores[candidate] > best_score:
+            best = candidate
+            best_score = scores[candidate]
+    if best != index:
+        moves[index], moves[best] = moves[best], moves[index]
+        scores[index], scores[best] = scores[best], scores[index]
+    return moves[index]
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget is used up."""
+
+
+# Engine of a worker process of the parallel search, kept between tasks to reuse its table,
+# and the generation of the main engine tables its own table belongs to.
+_worker_engine = None
+_worker_generation = 0
+
+
+def _init_search_worker(hash_size_mb, debug_evaluation, stop_event, shared_nodes):
+    """The function creates the engine of a worker process.
+    Inputs:
+            - hash_size_mb: integer
+            - debug_evaluation: boolean
+            - stop_event: multiprocessing.Event shared with the main engine to stop the tasks
+            - shared_nodes: multiprocessing.Value counting the nodes of all the workers"""
+    global _worker_engine
+    _worker_engine = ChessEngine(hash_size_mb=hash_size_mb, debug_evaluation=debug_evaluation)
+    _worker_engine.stop_event = stop_event
+    _worker_engine.shared_nodes = shared_nodes
+
+
+def _search_root_move(board, move, depth, alpha, deadline, node_limit, generation):
+    """The function searches one root move in a worker process.
+    Inputs:
+            - board: ChessBoard at the root
+            - move: root move to search
+            - depth: integer depth including the root move
+            - alpha: integer, scores at or below it only need to be bounds
+            - deadline: wall clock time to stop at, or None
+            - node_limit: integer or None, budget of the whole search shared by all the tasks
+            - generation: integer, the worker clears its table when the main engine cleared its own
+    Output:
+            - result: (score, principal variation after the move, nodes, quiescence nodes),
+              the score is None if the budget ran out or the search was stopped"""
+    global _worker_generation
+    engine = _worker_engine
+    if generation != _worker_generation:
+        engine.table.clear()
+        engine.history = {"white": [0] * 4096, "black": [0] * 4096}
+        _worker_generation = generation
+    # Tasks that start once the other workers used the whole budget are skipped.
+    if node_limit is not None and engine.shared_nodes.value >= node_limit:
+        return None, [], 0, 0
+    time_limit = max(deadline - time.time(), 0.0) if deadline is not None else None
+    engine._start_search(board, time_limit, None)
+    engine.shared_node_limit = node_limit
+    engine.shared_nodes_added = 0
+    engine.path_hashes.append(board.hash)
+    undo = board.make_move(move)
+    try:
+        score = -engine._negamax(board, depth - 1, -INFINITY, -alpha, 1)
+    except SearchTimeout:
+        score = None
+    finally:
+        board.unmake_move(undo)
+        engine._add_shared_nodes(check_limit=False)
+    line = list(engine.pv_table[1]) if score is not None else []
+    return score, line, engine.nodes, engine.quiescence_nodes
+
+
+class ChessEngine:
+
+    def __init__(
+        self,
+        max_depth=4,
+        time_limit=None,
+        node_limit=None,
+        hash_size_mb=16,
+        debug_evaluation=False,
+        workers=1,
+        book=None,
+        tablebase=None,
+    ):
+        """The function initializes the engine with its default search budget.
+        Inputs:
+                - max_depth: integer, deepest iteration of the iterative deepening
+                - time_limit: float seconds or None
+                - node_limit: integer or None
+                - hash_size_mb: integer, memory budget of the transposition table
+                - debug_evaluation: boolean, check the incremental evaluation at every leaf
+                - workers: integer, number of processes splitting the root moves
+                - book: OpeningBook played from before searching, or None
+                - tablebase: EndgameTablebase.Tablebase giving exact scores in covered endings, or None"""
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.debug_evaluation = debug_evaluation
+        self.hash_size_mb = hash_size_mb
+        self.workers = workers
+        self.book = book
+        self.tablebase = tablebase
+        self.pool = None
+        # Stop signal shared with the worker processes, and the generation of the tables
+        # that tells the workers to clear their own, see clear_tables.
+        self.worker_stop = None
+        self.table_generation = 0
+        # Node counter of all the worker processes, used to share the node limit.
+        self.shared_nodes = None
+        self.shared_node_limit = None
+        self.shared_nodes_added = 0
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.depth_reached = 0
+        # Best move of the last completed iteration, readable while a search runs.
+        self.best_move = None
+        self.deadline = None
+        self.current_node_limit = None
+        self.stop_event = None
+        self.pv_table = [[] for _ in range(MAX_PLY + 1)]
+        self.path_hashes = []
+        self.table = TranspositionTable(hash_size_mb)
+        # Quiet moves that caused a cutoff, two per ply, and cutoff counts per color and move.
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history = {"white": [0] * 4096, "black": [0] * 4096}
+
+    def evaluate(self, board):
+        """The function scores a position from the side to move point of view.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - score: integer centipawns"""
+        return ChessEvaluation.evaluate(board, self.debug_evaluation)
+
+    def search(self, board, max_depth=None, time_limit=None, node_limit=None, stop_event=None):
+        """The function searches the best move with iterative deepening alpha-beta.
+        The budget arguments override the defaults given to the engine.
+        Inputs:
+                - board: ChessBoard, restored to its original position on return
+                - max_depth: integer or None
+                - time_limit: float seconds or None
+                - node_limit: integer or None
+                - stop_event: threading.Event, the search returns its best move so far once set
+        Output:
+                - best_move: (start, end, promotion) tuple, or None without legal moves
+                - score: integer centipawns from the side to move point of view
+                - principal_variation: list of moves"""
+        self.stop_event = stop_event
+        max_depth = max_depth if max_depth is not None else self.max_depth
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        node_limit = node_limit if node_limit is not None else self.node_limit
+        self._start_search(board, time_limit, node_limit)
+
+        root_moves = board.generate_legal_moves()
+        if not root_moves:
+            return None, 0, []
+        if self.book is not None:
+            book_move = self.book.choose_move(board)
+            if book_move is not None:
+                self.best_move = book_move
+                return book_move, 0, [book_move]
+        if self.workers > 1:
+            return self._parallel_search(board, root_moves, max_depth, time_limit, node_limit)
+
+        best_move, best_score, principal_variation = root_moves[0], 0, [root_moves[0]]
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._search_root(board, root_moves, depth, principal_variation[0])
+            except SearchTimeout:
+                break
+            principal_variation = list(self.pv_table[0])
+            best_move, best_score = principal_variation[0], score
+            self.best_move = best_move
+            self.depth_reached = depth
+            # Stop early once a forced mate has been found.
+            if abs(score) >= MATE_BOUND:
+                break
+        return best_move, best_score, principal_variation
+
+    def _start_search(self, board, time_limit, node_limit):
+        """The function resets the counters and budget of the engine before a search.
+        Inputs:
+                - board: ChessBoard
+                - time_limit: float seconds or None
+                - node_limit: integer or None"""
+        self.current_node_limit = node_limit
+        self.deadline = time.perf_counter() + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.depth_reached = 0
+        self.best_move = None
+        # Positions already played in the game count for repetition detection.
+        self.path_hashes = [undo[-1] for undo in board.undo_stack]
+        # Killers are position specific, history is kept but aged between searches.
+        self.killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        for color in ("white", "black"):
+            self.history[color] = [value // 2 for value in self.history[color]]
+
+    def _parallel_search(self, board, root_moves, max_depth, time_limit, node_limit):
+        """The function runs iterative deepening with the root moves split over a process pool.
+        At each depth the expected best move is searched first to get a bound, then the
+        other moves are searched in parallel against that bound and the results merged.
+        Inputs:
+                - board: ChessBoard
+                - root_moves: list of legal moves
+                - max_depth: integer
+                - time_limit: float seconds or None
+                - node_limit: integer or None, budget of the whole search shared by the tasks
+        Output:
+                - best_move: (start, end, promotion) tuple
+                - score: integer
+                - principal_variation: list of moves"""
+        if self.pool is None:
+            # The process pool is only imported when it is used, to keep the engine quick to start.
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            context = multiprocessing.get_context()
+            self.worker_stop = context.Event()
+            self.shared_nodes = context.Value("q", 0)
+            self.pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_search_worker,
+                initargs=(self.hash_size_mb, self.debug_evaluation, self.worker_stop, self.shared_nodes),
+            )
+        self.worker_stop.clear()
+        with self.shared_nodes.get_lock():
+            self.shared_nodes.value = 0
+        # Workers run in other processes, so the deadline is shared as wall clock time.
+        deadline = time.time() + time_limit if time_limit is not None else None
+
+        best_move, best_score, principal_variation = root_moves[0], 0, [root_moves[0]]
+        for depth in range(1, max_depth + 1):
+            if self.stop_event is not None and self.stop_event.is_set():
+                break
+            if node_limit is not None and self.nodes >= node_limit:
+                break
+            first_move = principal_variation[0]
+            depth_score, line = self._wait_for_task(
+                self.pool.submit(
+                    _search_root_move,
+                    board, first_move, depth, -INFINITY, deadline, node_limit, self.table_generation,
+                )
+            )
+            if depth_score is None:
+                break
+            depth_move, depth_line = first_move, [first_move] + line
+
+            other_moves = [move for move in root_moves if move != first_move]
+            futures = [
+                self.pool.submit(
+                    _search_root_move,
+                    board, move, depth, depth_score, deadline, node_limit, self.table_generation,
+                )
+                for move in other_moves
+            ]
+            completed = True
+            for move, future in zip(other_moves, futures):
+                score, line = self._wait_for_task(future)
+                if score is None:
+                    completed = False
+                elif score > depth_score:
+                    depth_move, depth_score, depth_line = move, score, [move] + line
+
+            # An unfinished iteration may have missed the best move, keep the previous one.
+            if not completed:
+                break
+            best_move, best_score, principal_variation = depth_move, depth_score, depth_line
+            self.best_move = best_move
+            self.depth_reached = depth
+            if abs(depth_score) >= MATE_BOUND:
+                break
+        return best_move, best_score, principal_variation
+
+    def _wait_for_task(self, future):
+        """The function waits for a root move searched by a worker and adds up its nodes.
+        When the stop event of the search is set while waiting, the workers are told to stop.
+        Inputs:
+                - future: concurrent.futures.Future of _search_root_move
+        Output:
+                - score: integer, or None if the task did not finish
+                - line: principal variation after the root move"""
+        from concurrent.futures import wait
+
+        while not future.done():
+            wait([future], timeout=STOP_CHECK_SECONDS)
+            if self.stop_event is not None and self.stop_event.is_set():
+                self.worker_stop.set()
+        score, line, nodes, quiescence_nodes = future.result()
+        self.nodes += nodes
+        self.quiescence_nodes += quiescence_nodes
+        return score, line
+
+    def clear_tables(self):
+        """The function forgets what earlier searches learned: the transposition table and
+        the history of this engine and, on their next task, those of the worker processes."""
+        self.table.clear()
+        self.history = {"white": [0] * 4096, "black": [0] * 4096}
+        self.table_generation += 1
+
+    def close(self):
+        """The function shuts down the worker processes of the parallel search."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def _search_root(self, board, root_moves, depth, first_move):
+        """The function runs one iteration of the search at the root.
+        Inputs:
+                - board: ChessBoard
+                - root_moves: list of legal moves
+                - depth: integer
+                - first_move: best move of the previous iteration, searched first
+        Output:
+                - score: integer"""
+        moves = [first_move] + [move for move in root_moves if move != first_move]
+        alpha, beta = -INFINITY, INFINITY
+        self.path_hashes.append(board.hash)
+        try:
+            for move in moves:
+                undo = board.make_move(move)
+                try:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+                finally:
+                    board.unmake_move(undo)
+                if score > alpha:
+                    alpha = score
+                    self.pv_table[0] = [move] + self.pv_table[1]
+        finally:
+            self.path_hashes.pop()
+        return alpha
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """The function searches a position with negamax alpha-beta.
+        Inputs:
+                - board: ChessBoard
+                - depth: integer remaining depth
+                - alpha: integer lower bound
+                - beta: integer upper bound
+                - ply: integer distance from the root
+        Output:
+                - score: integer"""
+        self._count_node()
+        self.pv_table[ply] = []
+        key = board.hash
+
+        # A repeated position or the fifty-move rule is a draw.
+        if board.halfmove_clock >= 100 or key in self.path_hashes:
+            return 0
+        # Covered endings are scored exactly, mate distances count from the root.
+        if self.tablebase is not None and ply > 0:
+            result = self.tablebase.probe(board)
+            if result is not None:
+                outcome, plies = result
+                if outcome == "draw":
+                    return 0
+                return MATE_SCORE - ply - plies if outcome == "win" else -MATE_SCORE + ply + plies
+        if ply >= MAX_PLY:
+            return self.evaluate(board)
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        # Reuse the result of a transposition searched at least as deep.
+        hash_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            entry_depth, entry_score, bound, move_code = entry
+            if move_code is not None:
+                hash_move = decode_move(move_code)
+            if entry_depth >= depth:
+                entry_score = score_from_table(entry_score, ply)
+                if (
+                    bound == EXACT
+                    or (bound == LOWER_BOUND and entry_score >= beta)
+                    or (bound == UPPER_BOUND and entry_score <= alpha)
+                ):
+                    return entry_score
+
+        moves = board.generate_legal_moves()
+        if not moves:
+            opponent = "black" if board.turn == "white" else "white"
+            if board.is_square_attacked(board.king_positions[board.turn], opponent):
+                return -MATE_SCORE + ply
+            return 0
+
+        scores = self.score_moves(board, moves, ply, hash_move)
+        original_alpha = alpha
+        best_move = None
+        self.path_hashes.append(key)
+        try:
+            for index in range(len(moves)):
+                move = pick_next_move(moves, scores, index)
+                undo = board.make_move(move)
+                try:
+                    score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+                finally:
+                    board.unmake_move(undo)
+                if score >= beta:
+                    if not board.is_capture(move):
+                        self._record_quiet_cutoff(board.turn, move, depth, ply)
+                    self.table.store(
+                        key, depth, score_to_table(beta, ply), LOWER_BOUND, encode_move(move)
+                    )
+                    return beta
+                if score > alpha:
+                    alpha = score
+                    best_move = move
+                    self.pv_table[ply] = [move] + self.pv_table[ply + 1]
+        finally:
+            self.path_hashes.pop()
+
+        bound = EXACT if alpha > original_alpha else UPPER_BOUND
+        self.table.store(
+            key,
+            depth,
+            score_to_table(alpha, ply),
+            bound,
+            encode_move(best_move) if best_move is not None else None,
+        )
+        return alpha
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """The function extends a leaf with captures only until the position is quiet.
+        Inputs:
+                - board: ChessBoard
+                - alpha: integer lower bound
+                - beta: integer upper bound
+                - ply: integer distance from the root
+        Output:
+                - score: integer"""
+        self._count_node()
+        self.quiescence_nodes += 1
+
+        # The side to move may stand pat instead of capturing.
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta:
+            return beta
+        if stand_pat + BIG_DELTA < alpha:
+            return alpha  # Delta pruning: not even winning a queen raises alpha.
+        if stand_pat > alpha:
+            alpha = stand_pat
+        if ply >= MAX_PLY:
+            return alpha
+
+        grid = board.board
+        moves = board.generate_legal_moves(captures_only=True)
+        scores = self.score_moves(board, moves, ply)
+        for index in range(len(moves)):
+            move = pick_next_move(moves, scores, index)
+            start, end, promotion = move
+            victim = grid[end[0]][end[1]]
+            gain = PIECE_VALUES[victim.piece_type] if victim is not None else PIECE_VALUES["pawn"]
+            if promotion is not None:
+                gain += PIECE_VALUES[promotion] - PIECE_VALUES["pawn"]
+                if victim is None:
+                    gain -= PIECE_VALUES["pawn"]
+            if stand_pat + gain + DELTA_MARGIN < alpha:
+                continue  # Delta pruning: this capture cannot raise alpha.
+
+            undo = board.make_move(move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            if score >= beta:
+                return beta
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def score_moves(self, board, moves, ply, hash_move=None):
+        """The function gives every move an ordering score, higher scores are searched first.
+        Inputs:
+                - board: ChessBoard
+                - moves: list of moves
+                - ply: integer distance from the root
+                - hash_move: move stored in the transposition table or None
+        Output:
+                - scores: list of integers, one per move"""
+        grid = board.board
+        history = self.history[board.turn]
+        first_killer, second_killer = self.killers[ply]
+        scores = []
+        for move in moves:
+            start, end, promotion = move
+            if move == hash_move:
+                scores.append(HASH_MOVE_SCORE)
+                continue
+            attacker = grid[start[0]][start[1]]
+            victim = grid[end[0]][end[1]]
+            if victim is not None:
+                # Most valuable victim first, then least valuable attacker.
+                scores.append(
+                    CAPTURE_SCORE
+                    + PIECE_VALUES[victim.piece_type] * 10
+                    - ATTACKER_RANKS[attacker.piece_type]
+                )
+            elif attacker.piece_type == "pawn" and end == board.en_passant:
+                scores.append(CAPTURE_SCORE + PIECE_VALUES["pawn"] * 10 - 1)
+            elif promotion is not None:
+                scores.append(PROMOTION_SCORE + PIECE_VALUES[promotion])
+            elif move == first_killer:
+                scores.append(FIRST_KILLER_SCORE)
+            elif move == second_killer:
+                scores.append(SECOND_KILLER_SCORE)
+            else:
+                scores.append(history[(start[0] * 8 + start[1]) * 64 + end[0] * 8 + end[1]])
+        return scores
+
+    def _record_quiet_cutoff(self, color, move, depth, ply):
+        """The function remembers a quiet move that caused a beta cutoff.
+        Inputs:
+                - color: string, side that played the move
+                - move: (start, end, promotion) tuple
+                - depth: integer remaining depth of the cutoff
+                - ply: integer distance from the root"""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        start, end = move[0], move[1]
+        history = self.history[color]
+        index = (start[0] * 8 + start[1]) * 64 + end[0] * 8 + end[1]
+        history[index] = min(history[index] + depth * depth, HISTORY_LIMIT)
+
+    def _count_node(self):
+        """The function counts a searched node and stops the search when the budget is used."""
+        self.nodes += 1
+        if self.current_node_limit is not None and self.nodes >= self.current_node_limit:
+            raise SearchTimeout()
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.stop_event is not None and self.stop_event.is_set():
+                raise SearchTimeout()
+            if self.shared_nodes is not None and self.shared_node_limit is not None:
+                self._add_shared_nodes()
+
+    def _add_shared_nodes(self, check_limit=True):
+        """The function adds the nodes searched since the last call to the counter shared by
+        the worker processes, and stops the search once all of them used the node limit.
+        Inputs:
+                - check_limit: boolean, raise SearchTimeout when the limit is reached"""
+        with self.shared_nodes.get_lock():
+            self.shared_nodes.value += self.nodes - self.shared_nodes_added
+            total = self.shared_nodes.value
+        self.shared_nodes_added = self.nodes
+        if check_limit and total >= self.shared_node_limit:
+            raise SearchTimeout()
+
+
+class BackgroundSearch:
+    """Engine search running in a thread, so the caller such as the pygame event loop keeps
+    running. The search works on a copy of the board and can be stopped at any time."""
+
+    def __init__(self, engine, board, max_depth=None, time_limit=None, node_limit=None):
+        """The function starts searching a position in a new thread.
+        Inputs:
+                - engine: ChessEngine, not to be used by anything else until the search is done
+                - board: ChessBoard, copied so the caller can keep drawing it
+                - max_depth: integer or None
+                - time_limit: float seconds or None
+                - node_limit: integer or None"""
+        self.engine = engine
+        self.board = ChessBoard.from_fen(board.to_fen())
+        # The engine only reads the position keys of the undo records for repetitions.
+        self.board.undo_stack = list(board.undo_stack)
+        self.stop_event = threading.Event()
+        self.cancelled = False
+        self.result = None
+        self.error = None
+        self.thread = threading.Thread(
+            target=self._run, args=(max_depth, time_limit, node_limit), daemon=True
+        )
+        self.thread.start()
+
+    def _run(self, max_depth, time_limit, node_limit):
+        """The function runs the search in the worker thread and keeps its result."""
+        try:
+            self.result = self.engine.search(
+                self.board, max_depth, time_limit, node_limit, stop_event=self.stop_event
+            )
+        except Exception as error:
+            self.error = error
+
+    def done(self):
+        """The function checks if the search has finished."""
+        return not self.thread.is_alive()
+
+    def move_now(self):
+        """The function asks the search to stop and return its best move so far."""
+        self.stop_event.set()
+
+    def cancel(self):
+        """The function stops the search and discards its result, then waits for the thread."""
+        self.cancelled = True
+        self.stop_event.set()
+        self.thread.join()
+
+    def progress(self):
+        """The function reports how far the search has gone.
+        Output:
+                - depth: integer, last completed iteration
+                - nodes: integer, nodes searched so far
+                - best_move: (start, end, promotion) tuple or None"""
+        return self.engine.depth_reached, self.engine.nodes, self.engine.best_move
+
+    def take_result(self):
+        """The function returns the result of a finished search.
+        Output:
+                - result: (best_move, score, principal_variation) tuple, or None if cancelled"""
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        return None if self.cancelled else self.result
@@ -0,0 +1,168 @@
+# Define the material values in centipawns for the middlegame and the endgame.
+MIDGAME_VALUES = {"pawn": 82, "knight": 337, "bishop": 365, "rook": 477, "queen": 1025, "king": 0}
+ENDGAME_VALUES = {"pawn": 94, "knight": 281, "bishop": 297, "rook": 512, "queen": 936, "king": 0}
+
+# Define how much each piece counts towards the middlegame phase. 24 is the starting position.
+PHASE_WEIGHTS = {"pawn": 0, "knight": 1, "bishop": 1, "rook": 2, "queen": 4, "king": 0}
+MAX_PHASE = 24
+
+# Define the piece-square tables from white's point of view, row 0 is the eighth rank
+# like in ChessBoard.board. Black uses the same tables mirrored vertically.
+PAWN_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [10, 10, 20, 30, 30, 20, 10, 10],
+    [5, 5, 10, 25, 25, 10, 5, 5],
+    [0, 0, 0, 20, 20, 0, 0, 0],
+    [5, -5, -10, 0, 0, -10, -5, 5],
+    [5, 10, 10, -20, -20, 10, 10, 5],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+PAWN_ENDGAME_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [80, 80, 80, 80, 80, 80, 80, 80],
+    [50, 50, 50, 50, 50, 50, 50, 50],
+    [30, 30, 30, 30, 30, 30, 30, 30],
+    [15, 15, 15, 15, 15, 15, 15, 15],
+    [5, 5, 5, 5, 5, 5, 5, 5],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [0, 0, 0, 0, 0, 0, 0, 0],
+]
+KNIGHT_TABLE = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20, 0, 0, 0, 0, -20, -40],
+    [-30, 0, 10, 15, 15, 10, 0, -30],
+    [-30, 5, 15, 20, 20, 15, 5, -30],
+    [-30, 0, 15, 20, 20, 15, 0, -30],
+    [-30, 5, 10, 15, 15, 10, 5, -30],
+    [-40, -20, 0, 5, 5, 0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+]
+BISHOP_TABLE = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 10, 10, 5, 0, -10],
+    [-10, 5, 5, 10, 10, 5, 5, -10],
+    [-10, 0, 10, 10, 10, 10, 0, -10],
+    [-10, 10, 10, 10, 10, 10, 10, -10],
+    [-10, 5, 0, 0, 0, 0, 5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+]
+ROOK_TABLE = [
+    [0, 0, 0, 0, 0, 0, 0, 0],
+    [5, 10, 10, 10, 10, 10, 10, 5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [-5, 0, 0, 0, 0, 0, 0, -5],
+    [0, 0, 0, 5, 5, 0, 0, 0],
+]
+QUEEN_TABLE = [
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+    [-10, 0, 0, 0, 0, 0, 0, -10],
+    [-10, 0, 5, 5, 5, 5, 0, -10],
+    [-5, 0, 5, 5, 5, 5, 0, -5],
+    [0, 0, 5, 5, 5, 5, 0, -5],
+    [-10, 5, 5, 5, 5, 5, 0, -10],
+    [-10, 0, 5, 0, 0, 0, 0, -10],
+    [-20, -10, -10, -5, -5, -10, -10, -20],
+]
+KING_TABLE = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [20, 20, 0, 0, 0, 0, 20, 20],
+    [20, 30, 10, 0, 0, 10, 30, 20],
+]
+KING_ENDGAME_TABLE = [
+    [-50, -40, -30, -20, -20, -30, -40, -50],
+    [-30, -20, -10, 0, 0, -10, -20, -30],
+    [-30, -10, 20, 30, 30, 20, -10, -30],
+    [-30, -10, 30, 40, 40, 30, -10, -30],
+    [-30, -10, 30, 40, 40, 30, -10, -30],
+    [-30, -10, 20, 30, 30, 20, -10, -30],
+    [-30, -30, 0, 0, 0, 0, -30, -30],
+    [-50, -30, -30, -30, -30, -30, -30, -50],
+]
+
+MIDGAME_PIECE_TABLES = {
+    "pawn": PAWN_TABLE,
+    "knight": KNIGHT_TABLE,
+    "bishop": BISHOP_TABLE,
+    "rook": ROOK_TABLE,
+    "queen": QUEEN_TABLE,
+    "king": KING_TABLE,
+}
+ENDGAME_PIECE_TABLES = dict(MIDGAME_PIECE_TABLES, pawn=PAWN_ENDGAME_TABLE, king=KING_ENDGAME_TABLE)
+
+
+def _build_square_scores(values, piece_tables):
+    """The function combines material and piece-square tables into one list per piece.
+    Scores are from white's point of view, so black pieces get negative values.
+    Inputs:
+            - values: dictionary {piece_type: centipawns}
+            - piece_tables: dictionary {piece_type: 8x8 table}
+    Output:
+            - scores: dictionary {(piece_type, color): list of 64 scores indexed by row * 8 + col}"""
+    scores = {}
+    for piece_type, table in piece_tables.items():
+        white_scores = []
+        black_scores = []
+        for row in range(8):
+            for col in range(8):
+                white_scores.append(values[piece_type] + table[row][col])
+                black_scores.append(-(values[piece_type] + table[7 - row][col]))
+        scores[(piece_type, "white")] = white_scores
+        scores[(piece_type, "black")] = black_scores
+    return scores
+
+
+MIDGAME_SCORES = _build_square_scores(MIDGAME_VALUES, MIDGAME_PIECE_TABLES)
+ENDGAME_SCORES = _build_square_scores(ENDGAME_VALUES, ENDGAME_PIECE_TABLES)
+
+
+def compute_scores(board):
+    """The function adds up the material and piece-square scores of every piece on a board.
+    Inputs:
+            - board: ChessBoard
+    Output:
+            - midgame_score: integer, from white's point of view
+            - endgame_score: integer, from white's point of view
+            - phase: integer from 0 (endgame) to MAX_PHASE (middlegame) or more"""
+    midgame_score = 0
+    endgame_score = 0
+    phase = 0
+    for color in ("white", "black"):
+        for piece in board.pieces[color]:
+            square = piece.pos[0] * 8 + piece.pos[1]
+            key = (piece.piece_type, color)
+            midgame_score += MIDGAME_SCORES[key][square]
+            endgame_score += ENDGAME_SCORES[key][square]
+            phase += PHASE_WEIGHTS[piece.piece_type]
+    return midgame_score, endgame_score, phase
+
+
+def taper(midgame_score, endgame_score, phase):
+    """The function blends the middlegame and endgame scores by the game phase."""
+    phase = min(phase, MAX_PHASE)
+    return (midgame_score * phase + endgame_score * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def evaluate(board, debug=False):
+    """The function scores a position from the side to move point of view in O(1)
+    using the scores that ChessBoard keeps up to date on every move.
+    Inputs:
+            - board: ChessBoard
+            - debug: boolean, recompute the scores from scratch and check they match
+    Output:
+            - score: integer centipawns"""
+    if debug:
+        expected = compute_scores(board)
+        actual = (board.midgame_score, board.endgame_score, board.phase)
+        assert actual == expected, "Incremental evaluation %s != recomputed %s" % (actual, expected)
+    score = taper(board.midgame_score, board.endgame_score, board.phase)
+    return score if board.turn == "white" else -score
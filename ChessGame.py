@@ -1,29 +1,126 @@
-import pygame
-from ChessBoard import ChessBoard
+from ChessBoard import ChessBoard, move_to_uci
+from BitBoard import BitBoard
+from ChessEngine import ChessEngine, BackgroundSearch
+from OpeningBook import OpeningBook
+from EndgameTablebase import Tablebase
 
-# Define constantsfor screen and board.
-SCREEN_WIDTH = 600
-SCREEN_HEIGHT = 600
-BOARD_ROWS = 8
-BOARD_COLUMNS = 8
-SQUARE_SIZE = SCREEN_WIDTH // BOARD_COLUMNS
+# Board representations that can be selected when creating a game.
+BOARD_BACKENDS = {"mailbox": ChessBoard, "bitboard": BitBoard}
+
+# Deepest iteration searched by the computer player within its time limit.
+MAX_ENGINE_DEPTH = 32
+
+# Define the outline drawn around the selected piece.
+SELECTION_COLOR = (255, 215, 0)
+SELECTION_WIDTH = 3
 
 
 class ChessGame:
-    def __init__(self, screen):
+    def __init__(
+        self,
+        screen,
+        backend="mailbox",
+        engine_color=None,
+        engine_time=2.0,
+        book_path=None,
+        tablebase_path=None,
+    ):
         """The function initializes the chess game with a given screen.
         Inputs:
-                - screen: pygame surface display.       """
-        self.board = ChessBoard()
+                - screen: pygame surface display.
+                - backend: string, "mailbox" or "bitboard" board representation
+                - engine_color: string, color played by the computer, or None for two players
+                - engine_time: float, seconds the computer thinks per move
+                - book_path: string, opening book file used by the computer, or None
+                - tablebase_path: string, directory of endgame tables used by the computer, or None"""
+        if engine_color is not None and backend != "mailbox":
+            raise ValueError("The computer player requires the mailbox board backend.")
+        self.backend = backend
+        self.board = BOARD_BACKENDS[backend]()
         self.current_turn = "white"
         self.selected_piece = None
         self.screen = screen
+        # Squares changed since the last render, or the whole board after an invalidate.
+        self.dirty_squares = set()
+        self.needs_full_redraw = True
+        self.engine_color = engine_color
+        self.engine_time = engine_time
+        self.book = OpeningBook(book_path) if book_path is not None else None
+        self.tablebase = Tablebase(tablebase_path) if tablebase_path is not None else None
+        # The engine and its transposition table are created on the first move of the computer.
+        self.engine = None
+        # Search of the computer running in the background, or None.
+        self.search = None
+
+    def update(self):
+        """The function lets the computer play when it is its turn. The search runs in a
+        background thread, this function starts it and plays its move once it is done.
+        Output:
+                - condition: boolean, True if the computer moved"""
+        if self.current_turn != self.engine_color:
+            return False
+
+        if self.search is None:
+            if self.board.has_legal_moves(self.current_turn):
+                if self.engine is None:
+                    self.engine = ChessEngine(
+                        max_depth=MAX_ENGINE_DEPTH,
+                        time_limit=self.engine_time,
+                        book=self.book,
+                        tablebase=self.tablebase,
+                    )
+                self.search = BackgroundSearch(self.engine, self.board)
+            return False  # Otherwise the game is over.
+        if not self.search.done():
+            return False
+
+        result = self.search.take_result()
+        self.search = None
+        if result is None or result[0] is None:
+            return False
+        start, end, promotion = result[0]
+        return self.move_piece(start, end, promotion or "queen")
+
+    def is_thinking(self):
+        """The function checks if the computer is searching a move."""
+        return self.search is not None
+
+    def move_now(self):
+        """The function makes the computer play its best move found so far."""
+        if self.search is not None:
+            self.search.move_now()
+
+    def cancel_search(self):
+        """The function stops the search of the computer without playing its move."""
+        if self.search is not None:
+            self.search.cancel()
+            self.search = None
+
+    def search_status(self):
+        """The function describes the progress of the search of the computer.
+        Output:
+                - status: string, empty when the computer is not searching"""
+        if self.search is None:
+            return ""
+        depth, nodes, best_move = self.search.progress()
+        best = move_to_uci(best_move) if best_move is not None else "-"
+        return "Thinking: depth %d, %d nodes, best %s" % (depth, nodes, best)
+
+    def new_game(self):
+        """The function stops any search and sets up the starting position again."""
+        self.cancel_search()
+        self.board = BOARD_BACKENDS[self.backend]()
+        self.current_turn = "white"
+        self.selected_piece = None
+        self.dirty_squares.clear()
+        self.invalidate()
 
-    def move_piece(self, start_pos, end_pos):
+    def move_piece(self, start_pos, end_pos, promotion="queen"):
         """The function tries to move a piece from their start position to end position.
         Inputs:
                 - start_pos: tuple (row, col)
                 - end_pos: tuple (row, col) 
+                - promotion: string, piece type a pawn promotes to
         Output:
                 - condition: boolean"""
         
@@ -31,9 +128,16 @@ class ChessGame:
         
         # Check if the piece belongs to the player's turn.
         if piece and piece.color == self.current_turn:
-            success = self.board.move_piece(start_pos, end_pos, self.screen)
+            before = self.board_contents()
+            # The board is not drawn here, render redraws the changed squares.
+            success = self.board.move_piece(start_pos, end_pos, None, promotion)
             
             if success:
+                # Castling, en passant and promotion change more than the start and end squares.
+                after = self.board_contents()
+                self.dirty_squares.update(
+                    divmod(square, 8) for square in range(64) if before[square] != after[square]
+                )
                 # Change players turn.
                 self.current_turn = "black" if self.current_turn == "white" else "white"
                 return True
@@ -44,6 +148,13 @@ class ChessGame:
         """The function handles mouse click events to select and move chess pieces.
         Inputs:
                 - pos: tuple (row, col)"""
+        # Ignore clicks while the computer is to move.
+        if self.current_turn == self.engine_color:
+            return
+
+        # pygame is only needed by the window, so the renderer is imported on demand.
+        from ChessRenderer import SQUARE_SIZE
+
         # Convert position to board coordinates
         column = pos[0] // SQUARE_SIZE
         row = pos[1] // SQUARE_SIZE
@@ -53,12 +164,69 @@ class ChessGame:
 
             if self.move_piece(self.selected_piece, position):
                 # Deselect the chess piece after moving it.
-                self.selected_piece = None  
+                self.select(None)
             else:
                 # Deselect the chess piece if move is invalid.
-                self.selected_piece = None  
+                self.select(None)
         else:
             # Select piece at clicked position with current player's turn color.
             piece = self.board.get_piece(position)
             if piece and piece.color == self.current_turn:
-                self.selected_piece = position
\ No newline at end of file
+                self.select(position)
+
+    def select(self, position):
+        """The function changes the selected square and marks the old and new ones for redrawing.
+        Inputs:
+                - position: tuple (row, col) or None"""
+        if self.selected_piece is not None:
+            self.dirty_squares.add(self.selected_piece)
+        if position is not None:
+            self.dirty_squares.add(position)
+        self.selected_piece = position
+
+    def board_contents(self):
+        """The function lists the piece on every square, to find the squares a move changed.
+        Output:
+                - contents: list of 64 (piece_type, color) tuples or None"""
+        contents = []
+        for row in range(8):
+            for column in range(8):
+                piece = self.board.get_piece((row, column))
+                contents.append((piece.piece_type, piece.color) if piece is not None else None)
+        return contents
+
+    def invalidate(self):
+        """The function requests a redraw of the whole board, for example when the window was exposed."""
+        self.needs_full_redraw = True
+
+    def render(self, screen):
+        """The function redraws only what changed since the last render.
+        Inputs:
+                - screen: pygame surface display
+        Output:
+                - rects: list of pygame.Rect to pass to pygame.display.update, empty if nothing changed"""
+        # pygame is only needed by the window, so it is imported on demand.
+        import pygame
+        from ChessRenderer import SQUARE_SIZE, draw_board, draw_squares
+
+        if self.needs_full_redraw:
+            draw_board(screen, self.board)
+            rects = [screen.get_rect()]
+            redrawn = None
+        elif self.dirty_squares:
+            redrawn = sorted(self.dirty_squares)
+            rects = draw_squares(screen, self.board, redrawn)
+        else:
+            return []
+        self.needs_full_redraw = False
+        self.dirty_squares.clear()
+
+        if self.selected_piece is not None and (redrawn is None or self.selected_piece in redrawn):
+            row, column = self.selected_piece
+            pygame.draw.rect(
+                screen,
+                SELECTION_COLOR,
+                (column * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE),
+                SELECTION_WIDTH,
+            )
+        return rects
\ No newline at end of file
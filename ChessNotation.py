@@ -0,0 +1,277 @@
+import re
+
+from ChessBoard import (
+    ChessBoard,
+    FEN_PIECES,
+    STARTING_FEN,
+    parse_square,
+    square_name,
+)
+
+# Define the SAN letters of the pieces. Pawns have no letter.
+SAN_PIECES = {letter.upper(): piece_type for letter, piece_type in FEN_PIECES.items() if letter != "p"}
+SAN_LETTERS = {piece_type: letter for letter, piece_type in SAN_PIECES.items()}
+
+# Define a SAN move: piece, origin file and rank hints, capture, destination, promotion.
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$")
+
+# Define the tokens of PGN movetext. Comments, variations and annotations are skipped.
+MOVETEXT_TOKEN = re.compile(r"\{[^}]*\}?|;.*|\(|\)|\$\d+|[^\s(){};]+")
+MOVE_NUMBER = re.compile(r"^\d+\.*$")
+TAG_PATTERN = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+
+def parse_san(board, san):
+    """The function finds the legal move described by standard algebraic notation.
+    Inputs:
+            - board: ChessBoard, position before the move
+            - san: string such as e4, Nbd7, exd5, O-O or e8=Q+
+    Output:
+            - move: (start, end, promotion) tuple"""
+    notation = san.rstrip("+#!?")
+    legal_moves = board.generate_legal_moves()
+
+    if notation in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        row = 7 if board.turn == "white" else 0
+        end = (row, 6) if len(notation) == 3 else (row, 2)
+        for move in legal_moves:
+            if move[0] == (row, 4) and move[1] == end and board.board[row][4].piece_type == "king":
+                return move
+        raise ValueError("Illegal castling move: %s" % san)
+
+    match = SAN_PATTERN.match(notation)
+    if match is None:
+        raise ValueError("Invalid SAN move: %s" % san)
+    piece_letter, start_file, start_rank, destination, promotion_letter = match.groups()
+    piece_type = SAN_PIECES[piece_letter] if piece_letter else "pawn"
+    end = parse_square(destination)
+    promotion = FEN_PIECES[promotion_letter.lower()] if promotion_letter else None
+    start_column = ord(start_file) - ord("a") if start_file else None
+    start_row = 8 - int(start_rank) if start_rank else None
+
+    found = None
+    for move in legal_moves:
+        start, move_end, move_promotion = move
+        if move_end != end or move_promotion != promotion:
+            continue
+        if board.board[start[0]][start[1]].piece_type != piece_type:
+            continue
+        if start_column is not None and start[1] != start_column:
+            continue
+        if start_row is not None and start[0] != start_row:
+            continue
+        if found is not None:
+            raise ValueError("Ambiguous SAN move: %s" % san)
+        found = move
+    if found is None:
+        raise ValueError("Illegal SAN move: %s" % san)
+    return found
+
+
+def move_to_san(board, move):
+    """The function writes a legal move in standard algebraic notation.
+    Inputs:
+            - board: ChessBoard, position before the move
+            - move: (start, end, promotion) tuple
+    Output:
+            - san: string such as Nf3, exd5, O-O or e8=Q+"""
+    start, end, promotion = move
+    piece = board.board[start[0]][start[1]]
+    if piece.piece_type == "king" and abs(end[1] - start[1]) == 2:
+        san = "O-O" if end[1] == 6 else "O-O-O"
+    else:
+        capture = board.is_capture(move)
+        if piece.piece_type == "pawn":
+            san = (square_name(start)[0] + "x" if capture else "") + square_name(end)
+            if promotion is not None:
+                san += "=" + SAN_LETTERS[promotion]
+        else:
+            # Add the file, the rank or both when another piece of the same type can reach the square.
+            rivals = [
+                other[0]
+                for other in board.generate_legal_moves()
+                if other[1] == end
+                and other[0] != start
+                and board.board[other[0][0]][other[0][1]].piece_type == piece.piece_type
+            ]
+            hint = ""
+            if rivals:
+                if all(rival[1] != start[1] for rival in rivals):
+                    hint = square_name(start)[0]
+                elif all(rival[0] != start[0] for rival in rivals):
+                    hint = square_name(start)[1]
+                else:
+                    hint = square_name(start)
+            san = SAN_LETTERS[piece.piece_type] + hint + ("x" if capture else "") + square_name(end)
+
+    undo = board.make_move(move)
+    if board.is_king_in_check(board.turn)[0]:
+        san += "+" if board.has_legal_moves(board.turn) else "#"
+    board.unmake_move(undo)
+    return san
+
+
+def _parse_movetext(tokens, game):
+    """The function adds the moves and the result found in movetext tokens to a game.
+    Moves inside variations are skipped.
+    Inputs:
+            - tokens: list of strings
+            - game: dictionary being built by read_games"""
+    for token in tokens:
+        first = token[0]
+        if first == "{" or first == ";" or first == "$":
+            continue
+        if token == "(":
+            game["_depth"] += 1
+        elif token == ")":
+            game["_depth"] -= 1
+        elif game["_depth"] > 0 or MOVE_NUMBER.match(token):
+            continue
+        elif token in RESULTS:
+            game["result"] = token
+        else:
+            # Drop move numbers glued to the move, such as 1.e4 or 12...Nf6.
+            if first.isdigit():
+                token = token[token.rindex(".") + 1:]
+            game["moves"].append(token)
+
+
+def read_games(source):
+    """The function reads the games of a PGN file one at a time, so archives larger than
+    the memory can be processed. Only the current game is kept in memory.
+    Inputs:
+            - source: string path or text file object
+    Output:
+            - games: generator of dictionaries {"headers": dict, "moves": list of SAN, "result": string}"""
+    if isinstance(source, str):
+        with open(source, encoding="utf-8", errors="replace") as stream:
+            yield from read_games(stream)
+        return
+
+    game = None
+    in_comment = False
+    for line in source:
+        line = line.strip()
+        if in_comment:
+            # Skip the rest of a comment that started on a previous line.
+            if "}" not in line:
+                continue
+            line = line[line.index("}") + 1:]
+            in_comment = False
+        if not line or line[0] == "%":
+            continue
+
+        if line[0] == "[":
+            match = TAG_PATTERN.match(line)
+            if match is None:
+                continue
+            if game is not None and game["moves_started"]:
+                yield _finish_game(game)
+                game = None
+            if game is None:
+                game = _new_game()
+            game["headers"][match.group(1)] = match.group(2).replace('\\"', '"')
+            continue
+
+        if game is None:
+            game = _new_game()
+        game["moves_started"] = True
+        tokens = MOVETEXT_TOKEN.findall(line)
+        if tokens and tokens[-1][0] == "{" and not tokens[-1].endswith("}"):
+            in_comment = True
+        _parse_movetext(tokens, game)
+        if game["result"] is not None and game["_depth"] == 0:
+            yield _finish_game(game)
+            game = None
+
+    if game is not None and (game["moves"] or game["headers"]):
+        yield _finish_game(game)
+
+
+def _new_game():
+    """The function creates the dictionary of a game being read."""
+    return {"headers": {}, "moves": [], "result": None, "moves_started": False, "_depth": 0}
+
+
+def _finish_game(game):
+    """The function removes the reader state from a game and fills in a missing result."""
+    result = game["result"] or game["headers"].get("Result", "*")
+    return {"headers": game["headers"], "moves": game["moves"], "result": result}
+
+
+def replay_game(game):
+    """The function plays the moves of a game on a board, one position at a time.
+    The same board object is updated in place, so stages must copy what they keep.
+    Inputs:
+            - game: dictionary returned by read_games
+    Output:
+            - positions: generator of (board, move) pairs, board is the position before move"""
+    board = ChessBoard.from_fen(game["headers"].get("FEN", STARTING_FEN))
+    for san in game["moves"]:
+        move = parse_san(board, san)
+        yield board, move
+        board.make_move(move)
+
+
+def run_pipeline(source, stages, max_games=None):
+    """The function streams the games of a PGN source through analysis stages.
+    Every stage is called with (game, board, move) for each position of every game.
+    Games with an illegal or unreadable move are counted and skipped from that move on.
+    Inputs:
+            - source: string path or text file object
+            - stages: list of callables
+            - max_games: integer or None
+    Output:
+            - statistics: dictionary with the counts of games, positions and errors"""
+    statistics = {"games": 0, "positions": 0, "errors": 0}
+    for game in read_games(source):
+        if max_games is not None and statistics["games"] >= max_games:
+            break
+        statistics["games"] += 1
+        try:
+            for board, move in replay_game(game):
+                statistics["positions"] += 1
+                for stage in stages:
+                    stage(game, board, move)
+        except ValueError:
+            statistics["errors"] += 1
+    return statistics
+
+
+def write_game(stream, moves, headers=None, result="*", start_fen=STARTING_FEN):
+    """The function writes a game in PGN format.
+    Inputs:
+            - stream: text file object
+            - moves: list of (start, end, promotion) tuples
+            - headers: dictionary of tag pairs or None
+            - result: string
+            - start_fen: string, position before the first move"""
+    headers = dict(headers or {})
+    headers["Result"] = result
+    if start_fen != STARTING_FEN:
+        headers["SetUp"] = "1"
+        headers["FEN"] = start_fen
+    for name, value in headers.items():
+        stream.write('[%s "%s"]\n' % (name, str(value).replace('"', '\\"')))
+    stream.write("\n")
+
+    board = ChessBoard.from_fen(start_fen)
+    words = []
+    for move in moves:
+        if board.turn == "white":
+            words.append("%d." % board.fullmove_number)
+        elif not words:
+            words.append("%d..." % board.fullmove_number)
+        words.append(move_to_san(board, move))
+        board.make_move(move)
+    words.append(result)
+
+    line = ""
+    for word in words:
+        if len(line) + len(word) + 1 > 79:
+            stream.write(line + "\n")
+            line = word
+        else:
+            line = line + " " + word if line else word
+    stream.write(line + "\n\n")
@@ -0,0 +1,204 @@
+import mmap
+import struct
+
+from ChessBoard import ChessBoard, FEN_LETTERS
+
+# Define the 4-bit piece codes: 1 to 6 for white pieces, 9 to 14 for black pieces.
+PIECE_CODES = {}
+for _piece_index, _piece_type in enumerate(["pawn", "knight", "bishop", "rook", "queen", "king"]):
+    PIECE_CODES[(_piece_type, "white")] = _piece_index + 1
+    PIECE_CODES[(_piece_type, "black")] = _piece_index + 9
+CODE_LETTERS = {code: FEN_LETTERS[symbol] for symbol, code in PIECE_CODES.items()}
+
+# A packed position is 32 bytes: 64-bit occupancy (bit row * 8 + col), one nibble per
+# occupied square in bit order, then the flags byte (bit 0 black to move, bits 1 to 4
+# castling rights), the en passant file plus one (0 when none), the halfmove clock,
+# the fullmove number and padding.
+POSITION_FORMAT = struct.Struct("<Q16sBBBH3x")
+POSITION_BYTES = POSITION_FORMAT.size
+
+# A store file is a 16 byte header (magic and position count) followed by packed positions.
+STORE_MAGIC = b"CHESSPOS"
+STORE_HEADER = struct.Struct("<8sQ")
+
+
+def pack_position(board):
+    """The function encodes a position into a fixed-size binary record.
+    Inputs:
+            - board: ChessBoard
+    Output:
+            - data: bytes of length POSITION_BYTES"""
+    codes = {}
+    for color in ("white", "black"):
+        for piece in board.pieces[color]:
+            codes[piece.pos[0] * 8 + piece.pos[1]] = PIECE_CODES[(piece.piece_type, color)]
+    if len(codes) > 32:
+        raise ValueError("A packed position holds at most 32 pieces")
+
+    occupancy = 0
+    nibbles = 0
+    for index, square in enumerate(sorted(codes)):
+        occupancy |= 1 << square
+        nibbles |= codes[square] << (4 * index)
+
+    flags = (board.turn == "black") | board.castling_rights << 1
+    en_passant = 0 if board.en_passant is None else board.en_passant[1] + 1
+    return POSITION_FORMAT.pack(
+        occupancy,
+        nibbles.to_bytes(16, "little"),
+        flags,
+        en_passant,
+        min(board.halfmove_clock, 255),
+        min(board.fullmove_number, 65535),
+    )
+
+
+def unpack_fen(data):
+    """The function decodes a packed position into a FEN string.
+    Inputs:
+            - data: bytes-like object of length POSITION_BYTES
+    Output:
+            - fen: string"""
+    occupancy, nibble_bytes, flags, en_passant, halfmove_clock, fullmove_number = (
+        POSITION_FORMAT.unpack(data)
+    )
+    nibbles = int.from_bytes(nibble_bytes, "little")
+    squares = [None] * 64
+    while occupancy:
+        square = (occupancy & -occupancy).bit_length() - 1
+        squares[square] = CODE_LETTERS[nibbles & 15]
+        nibbles >>= 4
+        occupancy &= occupancy - 1
+
+    rows = []
+    for row in range(8):
+        row_text = ""
+        empty_squares = 0
+        for letter in squares[row * 8:row * 8 + 8]:
+            if letter is None:
+                empty_squares += 1
+            else:
+                if empty_squares:
+                    row_text += str(empty_squares)
+                    empty_squares = 0
+                row_text += letter
+        if empty_squares:
+            row_text += str(empty_squares)
+        rows.append(row_text)
+
+    black_to_move = flags & 1
+    castling = "".join(letter for bit, letter in enumerate("KQkq") if flags >> (bit + 1) & 1)
+    en_passant_square = "-"
+    if en_passant:
+        en_passant_square = "abcdefgh"[en_passant - 1] + ("3" if black_to_move else "6")
+    return "%s %s %s %s %d %d" % (
+        "/".join(rows),
+        "b" if black_to_move else "w",
+        castling or "-",
+        en_passant_square,
+        halfmove_clock,
+        fullmove_number,
+    )
+
+
+def unpack_position(data):
+    """The function decodes a packed position into a board.
+    Inputs:
+            - data: bytes-like object of length POSITION_BYTES
+    Output:
+            - board: ChessBoard"""
+    return ChessBoard.from_fen(unpack_fen(data))
+
+
+def write_position_store(path, boards):
+    """The function writes positions to a store file. The positions are streamed, so the
+    iterable can be a generator over more positions than fit in memory.
+    Inputs:
+            - path: string
+            - boards: iterable of ChessBoard or of packed bytes
+    Output:
+            - count: integer, number of positions written"""
+    count = 0
+    with open(path, "wb") as stream:
+        stream.write(STORE_HEADER.pack(STORE_MAGIC, 0))
+        for board in boards:
+            stream.write(board if isinstance(board, bytes) else pack_position(board))
+            count += 1
+        stream.seek(0)
+        stream.write(STORE_HEADER.pack(STORE_MAGIC, count))
+    return count
+
+
+class PositionStore:
+    """Read-only file of packed positions mapped into memory. Opening the store reads only
+    the header, and every position is decoded on access."""
+
+    def __init__(self, path):
+        """The function maps a store file into memory.
+        Inputs:
+                - path: string"""
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count = STORE_HEADER.unpack_from(self.map, 0)
+        if magic != STORE_MAGIC:
+            self.close()
+            raise ValueError("Not a position store: %s" % path)
+        if len(self.map) < STORE_HEADER.size + self.count * POSITION_BYTES:
+            self.close()
+            raise ValueError("Truncated position store: %s" % path)
+        self.view = memoryview(self.map)
+
+    def __len__(self):
+        return self.count
+
+    def record(self, index):
+        """The function returns the packed bytes of a position without copying them.
+        The view must be released or dropped before the store is closed.
+        Inputs:
+                - index: integer
+        Output:
+                - data: memoryview of length POSITION_BYTES"""
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Position index out of range: %d" % index)
+        offset = STORE_HEADER.size + index * POSITION_BYTES
+        return self.view[offset:offset + POSITION_BYTES]
+
+    def __getitem__(self, index):
+        """The function decodes the position stored at an index into a board."""
+        return unpack_position(self.record(index))
+
+    def fen(self, index):
+        """The function decodes the position stored at an index into a FEN string."""
+        return unpack_fen(self.record(index))
+
+    def records(self, start=0, stop=None):
+        """The function iterates over the packed positions without decoding them.
+        Inputs:
+                - start: integer, first index
+                - stop: integer or None, index after the last one
+        Output:
+                - records: generator of memoryview"""
+        stop = self.count if stop is None else min(stop, self.count)
+        for index in range(start, stop):
+            offset = STORE_HEADER.size + index * POSITION_BYTES
+            yield self.view[offset:offset + POSITION_BYTES]
+
+    def __iter__(self):
+        for data in self.records():
+            yield unpack_position(data)
+
+    def close(self):
+        """The function releases the memory map and the file."""
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
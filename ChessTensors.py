@@ -0,0 +1,92 @@
+import numpy as np
+
+from ChessEvaluation import MIDGAME_SCORES, ENDGAME_SCORES, PHASE_WEIGHTS, MAX_PHASE
+
+# Define the plane layout: twelve piece planes (white pawn to king, then black pawn to king),
+# one side to move plane, four castling rights planes and one en passant plane.
+PIECE_ORDER = ["pawn", "knight", "bishop", "rook", "queen", "king"]
+PIECE_PLANES = {
+    (piece_type, color): color_index * 6 + piece_index
+    for color_index, color in enumerate(("white", "black"))
+    for piece_index, piece_type in enumerate(PIECE_ORDER)
+}
+SIDE_TO_MOVE_PLANE = 12  # All ones when white is to move.
+CASTLING_PLANE = 13  # Planes 13 to 16 hold the four castling rights bits in order.
+EN_PASSANT_PLANE = 17
+PLANE_COUNT = 18
+
+# Evaluation weights laid out like the piece planes, see ChessEvaluation.
+MIDGAME_WEIGHTS = np.zeros((12, 8, 8), dtype=np.int32)
+ENDGAME_WEIGHTS = np.zeros((12, 8, 8), dtype=np.int32)
+PHASE_VECTOR = np.zeros(12, dtype=np.int32)
+for (_piece_type, _color), _plane in PIECE_PLANES.items():
+    MIDGAME_WEIGHTS[_plane] = np.array(MIDGAME_SCORES[(_piece_type, _color)]).reshape(8, 8)
+    ENDGAME_WEIGHTS[_plane] = np.array(ENDGAME_SCORES[(_piece_type, _color)]).reshape(8, 8)
+    PHASE_VECTOR[_plane] = PHASE_WEIGHTS[_piece_type]
+
+
+def plane_indexes(board):
+    """The function lists the flat indexes of the set cells of the planes of a board.
+    Inputs:
+            - board: ChessBoard
+    Output:
+            - indexes: list of integers plane * 64 + row * 8 + col"""
+    indexes = []
+    for color in ("white", "black"):
+        for piece in board.pieces[color]:
+            indexes.append(
+                PIECE_PLANES[(piece.piece_type, color)] * 64 + piece.pos[0] * 8 + piece.pos[1]
+            )
+    if board.turn == "white":
+        indexes.extend(range(SIDE_TO_MOVE_PLANE * 64, SIDE_TO_MOVE_PLANE * 64 + 64))
+    for bit in range(4):
+        if board.castling_rights >> bit & 1:
+            plane = CASTLING_PLANE + bit
+            indexes.extend(range(plane * 64, plane * 64 + 64))
+    if board.en_passant is not None:
+        indexes.append(EN_PASSANT_PLANE * 64 + board.en_passant[0] * 8 + board.en_passant[1])
+    return indexes
+
+
+def board_to_planes(board):
+    """The function encodes a position as a stack of 8x8 planes.
+    Inputs:
+            - board: ChessBoard
+    Output:
+            - planes: uint8 array of shape (PLANE_COUNT, 8, 8)"""
+    planes = np.zeros(PLANE_COUNT * 64, dtype=np.uint8)
+    planes[plane_indexes(board)] = 1
+    return planes.reshape(PLANE_COUNT, 8, 8)
+
+
+def build_batch(boards):
+    """The function encodes many positions into one contiguous array. The set cells of every
+    position are gathered into one index array and written with a single assignment.
+    Inputs:
+            - boards: sequence of ChessBoard
+    Output:
+            - batch: uint8 array of shape (len(boards), PLANE_COUNT, 8, 8)"""
+    indexes = []
+    position_size = PLANE_COUNT * 64
+    for position, board in enumerate(boards):
+        offset = position * position_size
+        indexes.extend([offset + index for index in plane_indexes(board)])
+    batch = np.zeros(len(boards) * position_size, dtype=np.uint8)
+    batch[np.array(indexes, dtype=np.int64)] = 1
+    return batch.reshape(len(boards), PLANE_COUNT, 8, 8)
+
+
+def evaluate_batch(batch):
+    """The function scores a batch of positions with the material and piece-square tables.
+    Inputs:
+            - batch: array of shape (positions, PLANE_COUNT, 8, 8)
+    Output:
+            - scores: int32 array of centipawns from the side to move point of view,
+              equal to ChessEvaluation.evaluate for every position"""
+    pieces = batch[:, :12].astype(np.int32)
+    midgame_scores = np.einsum("npij,pij->n", pieces, MIDGAME_WEIGHTS)
+    endgame_scores = np.einsum("npij,pij->n", pieces, ENDGAME_WEIGHTS)
+    phase = np.minimum(pieces.sum(axis=(2, 3)) @ PHASE_VECTOR, MAX_PHASE)
+    scores = (midgame_scores * phase + endgame_scores * (MAX_PHASE - phase)) // MAX_PHASE
+    white_to_move = batch[:, SIDE_TO_MOVE_PLANE, 0, 0].astype(bool)
+    return np.where(white_to_move, scores, -scores).astype(np.int32)
@@ -0,0 +1,281 @@
+import mmap
+import os
+import struct
+from array import array
+
+from ChessBoard import ChessBoard
+from ChessPieces import ChessPieces
+
+# Define the supported endings: the strong side has a king and one piece, the weak side a bare king.
+MATERIALS = {"KQK": "queen", "KRK": "rook", "KPK": "pawn"}
+MATERIAL_NAMES = {piece_type: material for material, piece_type in MATERIALS.items()}
+# Promotions of KPK lead into these tables, promoting to a bishop or a knight is a draw.
+PROMOTION_MATERIALS = {"queen": "KQK", "rook": "KRK"}
+
+# The index packs the side to move (0 when the strong side moves), the strong king square,
+# the weak king square and the piece square into 19 bits, squares are row * 8 + col with
+# the strong side playing white.
+SIDE_SHIFT = 18
+STRONG_KING_SHIFT = 12
+WEAK_KING_SHIFT = 6
+TABLE_SIZE = 1 << 19
+
+# Each entry is one byte: 0 for a draw or an illegal position, otherwise the number of
+# plies to mate plus one. The side to move wins when that number of plies is odd.
+TABLE_MAGIC = b"CHESSTB1"
+TABLE_HEADER = struct.Struct("<8s8s")
+
+
+def table_index(side, strong_king, weak_king, piece):
+    """The function packs a position of an ending into a table index.
+    Inputs:
+            - side: integer, 0 when the strong side moves and 1 otherwise
+            - strong_king: integer square row * 8 + col
+            - weak_king: integer square
+            - piece: integer square
+    Output:
+            - index: integer"""
+    return side << SIDE_SHIFT | strong_king << STRONG_KING_SHIFT | weak_king << WEAK_KING_SHIFT | piece
+
+
+def table_path(directory, material):
+    """The function returns the file name of the table of an ending."""
+    return os.path.join(directory, material + ".tb")
+
+
+def _set_position(board, kings, piece, piece_type, turn):
+    """The function places the three pieces of an ending on a board with the strong side as white.
+    Inputs:
+            - board: ChessBoard, emptied before the pieces are placed
+            - kings: (strong king square, weak king square) tuple of (row, col)
+            - piece: (row, col) of the strong piece
+            - piece_type: string
+            - turn: string"""
+    for color in ("white", "black"):
+        for old_piece in board.pieces[color]:
+            board.board[old_piece.pos[0]][old_piece.pos[1]] = None
+    white_king = ChessPieces("king", "white", kings[0])
+    black_king = ChessPieces("king", "black", kings[1])
+    white_piece = ChessPieces(piece_type, "white", piece)
+    for new_piece in (white_king, black_king, white_piece):
+        board.board[new_piece.pos[0]][new_piece.pos[1]] = new_piece
+    board.pieces = {"white": [white_king, white_piece], "black": [black_king]}
+    board.king_positions = {"white": kings[0], "black": kings[1]}
+    board.turn = turn
+
+
+def generate_table(material, promotion_tables=None):
+    """The function solves an ending by retrograde analysis. The legal moves of every
+    position are generated with the ChessBoard rules, then the results are propagated
+    backwards from the checkmates one ply at a time, which gives the distance to mate.
+    Inputs:
+            - material: string, key of MATERIALS
+            - promotion_tables: dictionary {material: table} of the endings reached by promotion
+    Output:
+            - table: bytearray of TABLE_SIZE entries"""
+    piece_type = MATERIALS[material]
+    promotion_tables = promotion_tables or {}
+    board = ChessBoard.from_fen("8/8/8/8/8/8/8/8 w - - 0 1")
+    table = bytearray(TABLE_SIZE)
+    # Weak side positions count the moves that are not known to lose yet.
+    remaining = array("H", bytes(2 * TABLE_SIZE))
+    edge_parents = array("I")
+    edge_children = array("I")
+    buckets = {}
+
+    for strong_king in range(64):
+        for weak_king in range(64):
+            if weak_king == strong_king:
+                continue
+            for piece in range(64):
+                if piece == strong_king or piece == weak_king:
+                    continue
+                if piece_type == "pawn" and (piece < 8 or piece >= 56):
+                    continue
+                kings = (divmod(strong_king, 8), divmod(weak_king, 8))
+                for side, turn in enumerate(("white", "black")):
+                    _set_position(board, kings, divmod(piece, 8), piece_type, turn)
+                    opponent = "black" if turn == "white" else "white"
+                    if board.is_square_attacked(board.king_positions[opponent], turn):
+                        continue  # The side that just moved left its king in check.
+                    index = table_index(side, strong_king, weak_king, piece)
+                    moves = board.generate_legal_moves()
+                    if side == 0:
+                        best_promotion = None
+                        for start, end, promotion in moves:
+                            end_square = end[0] * 8 + end[1]
+                            if start == kings[0]:
+                                child = table_index(1, end_square, weak_king, piece)
+                            elif promotion is None:
+                                child = table_index(1, strong_king, weak_king, end_square)
+                            else:
+                                # The promotion leaves this ending, its result is read from the next table.
+                                next_table = promotion_tables.get(PROMOTION_MATERIALS.get(promotion))
+                                if next_table is not None:
+                                    value = next_table[table_index(1, strong_king, weak_king, end_square)]
+                                    if value and (best_promotion is None or value < best_promotion):
+                                        best_promotion = value
+                                continue
+                            edge_parents.append(index)
+                            edge_children.append(child)
+                        if best_promotion is not None:
+                            buckets.setdefault(best_promotion, []).append(index)
+                    else:
+                        if not moves:
+                            if board.is_square_attacked(kings[1], "white"):
+                                table[index] = 1
+                                buckets.setdefault(0, []).append(index)
+                            continue
+                        escapes = False
+                        for _, end, _ in moves:
+                            end_square = end[0] * 8 + end[1]
+                            if end_square == piece:
+                                escapes = True  # Capturing the last piece is a draw.
+                                continue
+                            edge_parents.append(index)
+                            edge_children.append(table_index(0, strong_king, end_square, piece))
+                        remaining[index] = 0xFFFF if escapes else len(moves)
+
+    # Group the edges by child so the parents of a position are found directly.
+    offsets = array("I", bytes(4 * (TABLE_SIZE + 1)))
+    for child in edge_children:
+        offsets[child + 1] += 1
+    for index in range(TABLE_SIZE):
+        offsets[index + 1] += offsets[index]
+    parents = array("I", bytes(4 * len(edge_parents)))
+    fill = array("I", offsets)
+    for parent, child in zip(edge_parents, edge_children):
+        parents[fill[child]] = parent
+        fill[child] += 1
+    del edge_parents, edge_children, fill
+
+    done = bytearray(TABLE_SIZE)
+    plies = 0
+    while buckets:
+        for index in buckets.pop(plies, []):
+            if done[index] or (table[index] and table[index] != plies + 1):
+                continue
+            done[index] = 1
+            table[index] = plies + 1
+            for parent in parents[offsets[index]:offsets[index + 1]]:
+                if table[parent]:
+                    continue
+                if plies % 2 == 0:
+                    # The weak side is mated in this many plies, so the strong side wins one ply earlier.
+                    table[parent] = plies + 2
+                    buckets.setdefault(plies + 1, []).append(parent)
+                else:
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        table[parent] = plies + 2
+                        buckets.setdefault(plies + 1, []).append(parent)
+        plies += 1
+    return table
+
+
+def write_table(path, material, table):
+    """The function saves a table with its header.
+    Inputs:
+            - path: string
+            - material: string
+            - table: bytearray of TABLE_SIZE entries"""
+    with open(path, "wb") as stream:
+        stream.write(TABLE_HEADER.pack(TABLE_MAGIC, material.encode()))
+        stream.write(table)
+
+
+def generate_tablebases(directory, materials=("KQK", "KRK", "KPK")):
+    """The function generates the tables of several endings into a directory. The tables
+    reached by promotion are generated first when they are missing.
+    Inputs:
+            - directory: string
+            - materials: sequence of strings
+    Output:
+            - tables: dictionary {material: table}"""
+    os.makedirs(directory, exist_ok=True)
+    tables = {}
+    wanted = list(materials)
+    if "KPK" in wanted:
+        wanted = [material for material in PROMOTION_MATERIALS.values() if material not in wanted] + wanted
+        wanted.sort(key=lambda material: material == "KPK")
+    for material in wanted:
+        tables[material] = generate_table(material, tables)
+        write_table(table_path(directory, material), material, tables[material])
+    return tables
+
+
+class Tablebase:
+    """Endgame tables mapped into memory. A probe reads one byte, so it costs O(1)."""
+
+    def __init__(self, directory):
+        """The function maps every table file found in a directory.
+        Inputs:
+                - directory: string"""
+        self.files = {}
+        self.tables = {}
+        for material in MATERIALS:
+            path = table_path(directory, material)
+            if not os.path.exists(path):
+                continue
+            stream = open(path, "rb")
+            table = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, name = TABLE_HEADER.unpack_from(table, 0)
+            if magic != TABLE_MAGIC or name.rstrip(b"\0").decode() != material:
+                table.close()
+                stream.close()
+                raise ValueError("Invalid tablebase file: %s" % path)
+            self.files[material] = stream
+            self.tables[material] = table
+
+    def probe_value(self, board):
+        """The function reads the raw table entry of a position.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - value: integer entry, or None when no table covers the position"""
+        # The tables assume no castling rights, which a rook and king can still hold.
+        if len(board.pieces["white"]) + len(board.pieces["black"]) != 3 or board.castling_rights:
+            return None
+        strong_color = "white" if len(board.pieces["white"]) == 2 else "black"
+        strong_king = board.king_positions[strong_color]
+        weak_king = board.king_positions["black" if strong_color == "white" else "white"]
+        for piece in board.pieces[strong_color]:
+            if piece.piece_type != "king":
+                break
+        table = self.tables.get(MATERIAL_NAMES.get(piece.piece_type))
+        if table is None:
+            return None
+        squares = [strong_king, weak_king, piece.pos]
+        if strong_color == "black":
+            # Mirror the board so the strong side plays white.
+            squares = [(7 - row, col) for row, col in squares]
+        index = table_index(
+            0 if board.turn == strong_color else 1,
+            squares[0][0] * 8 + squares[0][1],
+            squares[1][0] * 8 + squares[1][1],
+            squares[2][0] * 8 + squares[2][1],
+        )
+        return table[TABLE_HEADER.size + index]
+
+    def probe(self, board):
+        """The function looks up the exact result of a position.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - result: ("win", plies), ("loss", plies) or ("draw", None) from the side to
+                  move point of view, or None when no table covers the position"""
+        value = self.probe_value(board)
+        if value is None:
+            return None
+        if value == 0:
+            return "draw", None
+        plies = value - 1
+        return ("win" if plies % 2 else "loss"), plies
+
+    def close(self):
+        """The function releases the memory maps and the files."""
+        for material, table in self.tables.items():
+            table.close()
+            self.files[material].close()
+        self.tables = {}
+        self.files = {}
@@ -0,0 +1,154 @@
+import mmap
+import os
+import random
+import struct
+
+from ChessBoard import encode_move, decode_move
+from ChessNotation import read_games, replay_game
+
+# Each entry is the Zobrist hash of a position, a move packed by encode_move and a weight.
+# Entries are sorted by hash, then by decreasing weight.
+ENTRY_FORMAT = struct.Struct("<QHH")
+ENTRY_BYTES = ENTRY_FORMAT.size
+KEY_FORMAT = struct.Struct("<Q")
+MAX_WEIGHT = 0xFFFF
+
+# Points given to a book move by the result of the game, from the mover's point of view.
+RESULT_POINTS = {"win": 2, "draw": 1, "loss": 0}
+
+
+def _result_points(result, color):
+    """The function scores a game result for the player of a color.
+    Inputs:
+            - result: string, "1-0", "0-1", "1/2-1/2" or "*"
+            - color: string
+    Output:
+            - points: integer"""
+    if result == "1-0":
+        return RESULT_POINTS["win" if color == "white" else "loss"]
+    if result == "0-1":
+        return RESULT_POINTS["win" if color == "black" else "loss"]
+    return RESULT_POINTS["draw"]
+
+
+def build_book(source, path, max_ply=20, min_weight=1):
+    """The function builds an opening book from the first moves of PGN games. A move is
+    weighted by the results of the games it was played in: 2 per win, 1 per draw or
+    unfinished game and 0 per loss of the side that played it.
+    Inputs:
+            - source: string path or text file object of PGN games
+            - path: string, book file written
+            - max_ply: integer, number of half moves of each game added to the book
+            - min_weight: integer, moves with a lower total weight are left out
+    Output:
+            - count: integer, number of entries written"""
+    weights = {}
+    for game in read_games(source):
+        try:
+            for ply, (board, move) in enumerate(replay_game(game)):
+                if ply >= max_ply:
+                    break
+                entry = (board.hash, encode_move(move))
+                weights[entry] = weights.get(entry, 0) + _result_points(game["result"], board.turn)
+        except ValueError:
+            # Keep the moves read before an illegal or unreadable move.
+            continue
+
+    entries = sorted(
+        ((key, code, min(weight, MAX_WEIGHT)) for (key, code), weight in weights.items() if weight >= min_weight),
+        key=lambda entry: (entry[0], -entry[2], entry[1]),
+    )
+    with open(path, "wb") as stream:
+        for entry in entries:
+            stream.write(ENTRY_FORMAT.pack(*entry))
+    return len(entries)
+
+
+class OpeningBook:
+    """Sorted file of book moves mapped into memory and searched by position hash.
+    Nothing is read when the book is opened, a probe touches only a few pages."""
+
+    def __init__(self, path, seed=None):
+        """The function maps a book file into memory.
+        Inputs:
+                - path: string
+                - seed: integer seed of the weighted random choice, or None"""
+        self.random = random.Random(seed)
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        if size % ENTRY_BYTES:
+            self.file.close()
+            raise ValueError("Invalid opening book size: %s" % path)
+        self.count = size // ENTRY_BYTES
+        # An empty file cannot be mapped, so it is kept as an empty buffer.
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return self.count
+
+    def _key_at(self, index):
+        """The function reads the position hash of an entry."""
+        return KEY_FORMAT.unpack_from(self.map, index * ENTRY_BYTES)[0]
+
+    def entries(self, key):
+        """The function finds the book moves of a position hash with a binary search.
+        Inputs:
+                - key: 64-bit Zobrist hash
+        Output:
+                - entries: list of (move_code, weight) tuples, heaviest first"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        entries = []
+        index = low
+        while index < self.count:
+            entry_key, code, weight = ENTRY_FORMAT.unpack_from(self.map, index * ENTRY_BYTES)
+            if entry_key != key:
+                break
+            entries.append((code, weight))
+            index += 1
+        return entries
+
+    def probe(self, board):
+        """The function lists the book moves of a position. Moves that are not legal, which
+        can only happen on a hash collision, are left out.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - moves: list of ((start, end, promotion), weight) tuples, heaviest first"""
+        entries = self.entries(board.hash)
+        if not entries:
+            return []
+        legal_moves = board.generate_legal_moves()
+        moves = []
+        for code, weight in entries:
+            move = decode_move(code)
+            if move in legal_moves:
+                moves.append((move, weight))
+        return moves
+
+    def choose_move(self, board):
+        """The function picks a book move at random in proportion to the weights.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - move: (start, end, promotion) tuple, or None when the position is not in the book"""
+        moves = [(move, weight) for move, weight in self.probe(board) if weight > 0]
+        if not moves:
+            return None
+        threshold = self.random.randrange(sum(weight for _, weight in moves))
+        for move, weight in moves:
+            threshold -= weight
+            if threshold < 0:
+                return move
+        return moves[-1][0]
+
+    def close(self):
+        """The function releases the memory map and the file."""
+        if self.count:
+            self.map.close()
+        self.file.close()
@@ -0,0 +1,121 @@
+from array import array
+
+# Define the bound types stored with a score.
+EXACT = 0
+LOWER_BOUND = 1  # The score failed high, the real score is at least this value.
+UPPER_BOUND = 2  # The score failed low, the real score is at most this value.
+
+# Each entry is a 64-bit key plus a 64-bit packed data word.
+ENTRY_BYTES = 16
+SLOTS_PER_BUCKET = 2  # Slot 0 keeps the deepest result, slot 1 is always replaced.
+
+# Layout of the data word: score (32 bits), depth (8 bits), bound (2 bits), move (16 bits).
+SCORE_OFFSET = 1 << 31
+SCORE_MASK = (1 << 32) - 1
+DEPTH_SHIFT = 32
+BOUND_SHIFT = 40
+MOVE_SHIFT = 42
+NO_MOVE = 0xFFFF
+
+
+class TranspositionTable:
+    """Fixed-size hash table of search results stored in flat arrays of 64-bit integers."""
+
+    def __init__(self, size_mb=16):
+        """The function allocates the table within a memory budget.
+        Inputs:
+                - size_mb: number of megabytes used by the entries"""
+        buckets = max(1, size_mb * 1024 * 1024 // (ENTRY_BYTES * SLOTS_PER_BUCKET))
+        # Round down to a power of two so the bucket is found with a mask.
+        self.bucket_count = 1 << (buckets.bit_length() - 1)
+        self.bucket_mask = self.bucket_count - 1
+        self.keys = array("Q", bytes(8 * self.bucket_count * SLOTS_PER_BUCKET))
+        self.data = array("Q", bytes(8 * self.bucket_count * SLOTS_PER_BUCKET))
+        self.reset_statistics()
+
+    def reset_statistics(self):
+        """The function sets the probe, hit and store counters to zero."""
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def clear(self):
+        """The function removes every entry from the table."""
+        size = self.bucket_count * SLOTS_PER_BUCKET
+        self.keys = array("Q", bytes(8 * size))
+        self.data = array("Q", bytes(8 * size))
+        self.reset_statistics()
+
+    def probe(self, key):
+        """The function looks up the stored result of a position.
+        Inputs:
+                - key: 64-bit Zobrist hash of the position
+        Output:
+                - entry: (depth, score, bound, move_code) tuple, or None if not stored
+                  move_code is None when no best move was stored"""
+        self.probes += 1
+        index = (key & self.bucket_mask) * SLOTS_PER_BUCKET
+        keys = self.keys
+        if keys[index] == key:
+            packed = self.data[index]
+        elif keys[index + 1] == key:
+            packed = self.data[index + 1]
+        else:
+            return None
+        self.hits += 1
+        move_code = packed >> MOVE_SHIFT
+        return (
+            (packed >> DEPTH_SHIFT) & 0xFF,
+            (packed & SCORE_MASK) - SCORE_OFFSET,
+            (packed >> BOUND_SHIFT) & 3,
+            None if move_code == NO_MOVE else move_code,
+        )
+
+    def store(self, key, depth, score, bound, move_code):
+        """The function stores a search result using the depth-preferred/always-replace scheme.
+        Inputs:
+                - key: 64-bit Zobrist hash of the position
+                - depth: integer searched depth
+                - score: integer
+                - bound: EXACT, LOWER_BOUND or UPPER_BOUND
+                - move_code: encoded best move or None"""
+        self.stores += 1
+        packed = (
+            (score + SCORE_OFFSET)
+            | (min(max(depth, 0), 0xFF) << DEPTH_SHIFT)
+            | (bound << BOUND_SHIFT)
+            | ((NO_MOVE if move_code is None else move_code) << MOVE_SHIFT)
+        )
+        index = (key & self.bucket_mask) * SLOTS_PER_BUCKET
+        keys = self.keys
+        stored_key = keys[index]
+        # The depth-preferred slot only accepts results at least as deep as its own.
+        if stored_key == key or stored_key == 0 or depth >= (self.data[index] >> DEPTH_SHIFT) & 0xFF:
+            if stored_key != key and stored_key != 0:
+                self.replacements += 1
+            keys[index] = key
+            self.data[index] = packed
+        else:
+            if keys[index + 1] not in (key, 0):
+                self.replacements += 1
+            keys[index + 1] = key
+            self.data[index + 1] = packed
+
+    def hit_rate(self):
+        """The function returns the fraction of probes that found their position."""
+        return self.hits / self.probes if self.probes else 0.0
+
+    def statistics(self):
+        """The function returns the table size and usage counters.
+        Output:
+                - statistics: dictionary"""
+        return {
+            "entries": self.bucket_count * SLOTS_PER_BUCKET,
+            "size_mb": self.bucket_count * SLOTS_PER_BUCKET * ENTRY_BYTES / (1024 * 1024),
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hit_rate(),
+            "stores": self.stores,
+            "replacements": self.replacements,
+        }
@@ -0,0 +1,571 @@
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ChessBoard import ChessBoard, STARTING_FEN, move_to_uci
+from ChessEngine import ChessEngine
+from ChessGame import BOARD_BACKENDS
+from ChessNotation import run_pipeline, write_game
+from OpeningBook import OpeningBook, build_book
+from EndgameTablebase import MATERIALS, Tablebase, generate_tablebases, table_path
+from ChessPositions import PositionStore, pack_position, write_position_store
+
+# Reference positions with their known perft node counts for depth 1, 2, 3...
+PERFT_POSITIONS = [
+    ("Starting position", STARTING_FEN, [20, 400, 8902, 197281, 4865609]),
+    (
+        "Kiwipete",
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        [48, 2039, 97862, 4085603],
+    ),
+    (
+        "Position 3",
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        [14, 191, 2812, 43238, 674624],
+    ),
+    (
+        "Position 4",
+        "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+        [6, 264, 9467, 422333],
+    ),
+    (
+        "Position 5",
+        "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+        [44, 1486, 62379, 2103487],
+    ),
+    (
+        "Position 6",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        [46, 2079, 89890, 3894594],
+    ),
+]
+
+
+# Test positions used to measure the engine time to reach a fixed depth.
+SEARCH_POSITIONS = [
+    STARTING_FEN,
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+]
+
+
+def run_search_benchmark(depth, workers):
+    """The function measures the time the engine needs to reach a depth on the test positions.
+    Inputs:
+            - depth: integer
+            - workers: integer, number of search processes
+    Output:
+            - total_time: float seconds"""
+    engine = ChessEngine(workers=workers)
+    # Start the worker processes before timing.
+    engine.search(ChessBoard(), max_depth=1)
+    total_time = 0.0
+    total_nodes = 0
+    for fen in SEARCH_POSITIONS:
+        engine.clear_tables()
+        board = ChessBoard.from_fen(fen)
+        start_time = time.perf_counter()
+        best_move, score, _ = engine.search(board, max_depth=depth)
+        elapsed = time.perf_counter() - start_time
+        total_time += elapsed
+        total_nodes += engine.nodes
+        print(
+            "workers %d  depth %d  %-6s score %6d  nodes %9d  %8.3fs  %9.0f nodes/s"
+            % (workers, depth, move_to_uci(best_move), score, engine.nodes, elapsed,
+               engine.nodes / max(elapsed, 1e-9))
+        )
+    engine.close()
+    print(
+        "workers %d total: %d nodes in %.3fs (%.0f nodes/s)"
+        % (workers, total_nodes, total_time, total_nodes / max(total_time, 1e-9))
+    )
+    return total_time
+
+
+def run_fen_benchmark(seconds):
+    """The function measures how many FEN strings per second are parsed and written back.
+    Inputs:
+            - seconds: float, time spent on each of parsing and writing"""
+    fens = [fen for _, fen, _ in PERFT_POSITIONS]
+    boards = [ChessBoard.from_fen(fen) for fen in fens]
+    for fen, board in zip(fens, boards):
+        if board.to_fen() != fen:
+            print("Round trip FAILED: %s != %s" % (board.to_fen(), fen))
+
+    for name, function, arguments in (
+        ("parse", ChessBoard.from_fen, fens),
+        ("write", ChessBoard.to_fen, boards),
+    ):
+        count = 0
+        start_time = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < seconds:
+            for argument in arguments:
+                function(argument)
+            count += len(arguments)
+            elapsed = time.perf_counter() - start_time
+        print("FEN %s: %d positions in %.3fs (%.0f positions/s)" % (name, count, elapsed, count / elapsed))
+
+
+def write_random_games(path, games, seed=0):
+    """The function writes random legal games to a PGN file to benchmark the reader.
+    Inputs:
+            - path: string
+            - games: integer
+            - seed: integer"""
+    generator = random.Random(seed)
+    with open(path, "w") as stream:
+        for index in range(games):
+            board = ChessBoard()
+            moves = []
+            while len(moves) < 160:
+                legal_moves = board.generate_legal_moves()
+                if not legal_moves:
+                    break
+                move = generator.choice(legal_moves)
+                moves.append(move)
+                board.make_move(move)
+            write_game(stream, moves, {"Event": "Benchmark", "Round": index + 1})
+
+
+def run_pgn_benchmark(path, games):
+    """The function measures how many games per second are read and replayed from a PGN file.
+    Inputs:
+            - path: string or None, a file of random games is generated when None
+            - games: integer, number of generated games or maximum number of games read"""
+    temporary_path = None
+    if path is None:
+        handle, temporary_path = tempfile.mkstemp(suffix=".pgn")
+        os.close(handle)
+        write_random_games(temporary_path, games)
+        path = temporary_path
+    try:
+        start_time = time.perf_counter()
+        stats = run_pipeline(path, [], max_games=None if temporary_path else games)
+        elapsed = time.perf_counter() - start_time
+    finally:
+        if temporary_path is not None:
+            os.remove(temporary_path)
+    print(
+        "PGN replay: %d games, %d positions, %d errors in %.3fs (%.1f games/s, %.0f positions/s)"
+        % (stats["games"], stats["positions"], stats["errors"], elapsed,
+           stats["games"] / max(elapsed, 1e-9), stats["positions"] / max(elapsed, 1e-9))
+    )
+
+
+def run_book_benchmark(path, games, probes):
+    """The function builds an opening book and measures how long a probe takes.
+    Inputs:
+            - path: string or None, PGN file of the games, random games are generated when None
+            - games: integer, number of generated games
+            - probes: integer, number of probes timed"""
+    handle, book_path = tempfile.mkstemp(suffix=".book")
+    os.close(handle)
+    pgn_path = None
+    if path is None:
+        handle, pgn_path = tempfile.mkstemp(suffix=".pgn")
+        os.close(handle)
+        write_random_games(pgn_path, games)
+        path = pgn_path
+    try:
+        start_time = time.perf_counter()
+        count = build_book(path, book_path, max_ply=12)
+        print("Build: %d entries in %.3fs" % (count, time.perf_counter() - start_time))
+
+        start_time = time.perf_counter()
+        book = OpeningBook(book_path, seed=0)
+        print("Open: %.6fs" % (time.perf_counter() - start_time))
+
+        board = ChessBoard()
+        start_time = time.perf_counter()
+        for _ in range(probes):
+            book.entries(board.hash)
+        elapsed = time.perf_counter() - start_time
+        print("Probe: %d lookups in %.3fs (%.1f microseconds each)" % (probes, elapsed, elapsed / probes * 1e6))
+
+        moves = book.probe(board)
+        print("Starting position: %d book moves, %s chosen" % (len(moves), move_to_uci(book.choose_move(board))))
+        book.close()
+    finally:
+        os.remove(book_path)
+        if pgn_path is not None:
+            os.remove(pgn_path)
+
+
+# Endgame positions probed by the tablebase benchmark.
+TABLEBASE_POSITIONS = [
+    "8/8/8/4k3/8/8/8/3QK3 w - - 0 1",
+    "8/8/8/8/3k4/8/8/R3K3 b - - 0 1",
+    "8/8/8/8/4k3/8/4P3/4K3 w - - 0 1",
+]
+
+
+def run_tablebase_benchmark(directory, probes):
+    """The function generates the missing endgame tables and measures the time of a probe.
+    Inputs:
+            - directory: string, directory of the table files
+            - probes: integer, number of probes timed per position"""
+    missing = [material for material in MATERIALS if not os.path.exists(table_path(directory, material))]
+    if missing:
+        start_time = time.perf_counter()
+        generate_tablebases(directory, missing)
+        print("Generated %s in %.1fs" % (", ".join(missing), time.perf_counter() - start_time))
+
+    tablebase = Tablebase(directory)
+    for fen in TABLEBASE_POSITIONS:
+        board = ChessBoard.from_fen(fen)
+        start_time = time.perf_counter()
+        for _ in range(probes):
+            tablebase.probe(board)
+        elapsed = time.perf_counter() - start_time
+        print(
+            "%-34s %-18s %.2f microseconds per probe"
+            % (fen, "%s %s" % tablebase.probe(board), elapsed / probes * 1e6)
+        )
+    tablebase.close()
+
+
+def run_uci_benchmark(runs):
+    """The function measures the time from starting the UCI engine to its readyok answer.
+    Inputs:
+            - runs: integer, number of engine processes started"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    check = subprocess.run(
+        [sys.executable, "-c", "import sys, uci; print('pygame' in sys.modules)"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    print("pygame imported by uci.py: %s" % check.stdout.strip())
+
+    for name, command in (
+        ("Python startup", [sys.executable, "-c", "pass"]),
+        ("UCI readyok", [sys.executable, os.path.join(directory, "uci.py")]),
+    ):
+        times = []
+        for _ in range(runs):
+            start_time = time.perf_counter()
+            process = subprocess.Popen(
+                command, cwd=directory, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+            )
+            if name == "UCI readyok":
+                process.stdin.write("uci\nisready\n")
+                process.stdin.flush()
+                for line in process.stdout:
+                    if line.strip() == "readyok":
+                        break
+                times.append(time.perf_counter() - start_time)
+                process.stdin.write("quit\n")
+                process.stdin.flush()
+                process.communicate()
+            else:
+                process.communicate()
+                times.append(time.perf_counter() - start_time)
+        print(
+            "%-15s median %.1f ms  min %.1f ms  max %.1f ms"
+            % (name, statistics.median(times) * 1000, min(times) * 1000, max(times) * 1000)
+        )
+
+
+# Modules timed by the import benchmark. The rules core must not load third-party modules.
+CORE_MODULE = "ChessBoard"
+IMPORT_MODULES = (CORE_MODULE, "ChessEngine", "ChessRenderer")
+
+# Program run in a fresh interpreter to time one import and list the modules it loads.
+IMPORT_PROBE = (
+    "import importlib, sys, time\n"
+    "IMPORT_TAG = sys.argv[2]\n"
+    "before = set(sys.modules)\n"
+    "start = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[1])\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(IMPORT_TAG, elapsed, *sorted({name.split('.')[0] for name in set(sys.modules) - before}))\n"
+)
+# Prefix of the line printed by the probe, modules such as pygame print their own banner first.
+IMPORT_TAG = "import-time:"
+
+
+def run_import_benchmark(runs):
+    """The function measures the cold import time of the rules core and of the modules
+    built on it, each in a new interpreter as when a worker process is spawned.
+    Inputs:
+            - runs: integer, number of interpreters started per module
+    Output:
+            - success: boolean, False when the rules core loads a third-party module"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    success = True
+    for module in IMPORT_MODULES:
+        times = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-c", IMPORT_PROBE, module, IMPORT_TAG],
+                cwd=directory,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.splitlines()
+            fields = next(line for line in output if line.startswith(IMPORT_TAG)).split()[1:]
+            times.append(float(fields[0]))
+        # Local modules and the standard library are expected, anything else is third-party.
+        third_party = [
+            name
+            for name in fields[1:]
+            if name not in sys.stdlib_module_names
+            and not os.path.exists(os.path.join(directory, name + ".py"))
+        ]
+        print(
+            "%-14s median %.1f ms  min %.1f ms  third-party: %s"
+            % (module, statistics.median(times) * 1000, min(times) * 1000, " ".join(third_party) or "none")
+        )
+        if module == CORE_MODULE and third_party:
+            success = False
+    return success
+
+
+def random_positions(count, seed=0):
+    """The function plays random legal games and yields the positions reached.
+    Inputs:
+            - count: integer, number of positions
+            - seed: integer
+    Output:
+            - boards: generator of ChessBoard, the same object is updated in place"""
+    generator = random.Random(seed)
+    produced = 0
+    while produced < count:
+        board = ChessBoard()
+        for _ in range(120):
+            legal_moves = board.generate_legal_moves()
+            if not legal_moves or produced >= count:
+                break
+            board.make_move(generator.choice(legal_moves))
+            produced += 1
+            yield board
+
+
+def run_store_benchmark(positions, reads):
+    """The function measures packing, opening and random access of a position store.
+    Inputs:
+            - positions: integer, number of positions written
+            - reads: integer, number of random positions decoded"""
+    handle, path = tempfile.mkstemp(suffix=".positions")
+    os.close(handle)
+    try:
+        packed = [pack_position(board) for board in random_positions(positions)]
+        boards = [ChessBoard.from_fen(board.to_fen()) for board in random_positions(2000, seed=1)]
+        start_time = time.perf_counter()
+        for board in boards:
+            pack_position(board)
+        elapsed = time.perf_counter() - start_time
+        print("Pack: %.0f positions/s" % (len(boards) / max(elapsed, 1e-9)))
+        write_position_store(path, packed)
+
+        start_time = time.perf_counter()
+        store = PositionStore(path)
+        print("Open: %d positions in %.6fs" % (len(store), time.perf_counter() - start_time))
+
+        generator = random.Random(2)
+        indexes = [generator.randrange(len(store)) for _ in range(reads)]
+        start_time = time.perf_counter()
+        for index in indexes:
+            store[index]
+        elapsed = time.perf_counter() - start_time
+        print("Random access: %d boards in %.3fs (%.0f positions/s)" % (reads, elapsed, reads / max(elapsed, 1e-9)))
+
+        start_time = time.perf_counter()
+        black_to_move = 0
+        for data in store.records():
+            black_to_move += data[24] & 1
+        elapsed = time.perf_counter() - start_time
+        print(
+            "Scan: %d records (%d black to move) in %.3fs (%.0f records/s)"
+            % (len(store), black_to_move, elapsed, len(store) / max(elapsed, 1e-9))
+        )
+        del data
+        store.close()
+    finally:
+        os.remove(path)
+
+
+def run_perft_suite(depth, backend="mailbox"):
+    """The function runs perft on the reference positions and checks the node counts.
+    Inputs:
+            - depth: integer, maximum depth searched in each position
+            - backend: string, key of BOARD_BACKENDS
+    Output:
+            - passed: boolean"""
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, counts in PERFT_POSITIONS:
+        board = BOARD_BACKENDS[backend].from_fen(fen)
+        for current_depth in range(1, min(depth, len(counts)) + 1):
+            start_time = time.perf_counter()
+            nodes = board.perft(current_depth)
+            elapsed = time.perf_counter() - start_time
+            total_nodes += nodes
+            total_time += elapsed
+
+            expected = counts[current_depth - 1]
+            status = "ok" if nodes == expected else "FAILED (expected %d)" % expected
+            passed = passed and nodes == expected
+            print(
+                "%-18s depth %d  nodes %10d  %8.3fs  %9.0f nodes/s  %s"
+                % (name, current_depth, nodes, elapsed, nodes / max(elapsed, 1e-9), status)
+            )
+
+    print(
+        "Total: %d nodes in %.3fs (%.0f nodes/s)"
+        % (total_nodes, total_time, total_nodes / max(total_time, 1e-9))
+    )
+    return passed
+
+
+def run_backend_benchmark(depth, calls):
+    """The function compares the board backends on the reference positions: the time of one
+    legal move generation and the perft speed, after checking that both count the same nodes.
+    Inputs:
+            - depth: integer, perft depth
+            - calls: integer, number of move generations timed per position
+    Output:
+            - passed: boolean, False when the backends disagree on a node count"""
+    passed = True
+    totals = {backend: [0, 0.0] for backend in BOARD_BACKENDS}
+    print("%-18s %22s %22s %8s" % ("", "move generation (us)", "perft (nodes/s)", "speedup"))
+    print("%-18s %10s %11s %10s %11s" % ("", "mailbox", "bitboard", "mailbox", "bitboard"))
+    for name, fen, counts in PERFT_POSITIONS:
+        generation = {}
+        speed = {}
+        for backend, board_class in BOARD_BACKENDS.items():
+            board = board_class.from_fen(fen)
+            start_time = time.perf_counter()
+            for _ in range(calls):
+                board.generate_legal_moves()
+            generation[backend] = (time.perf_counter() - start_time) / calls * 1e6
+
+            current_depth = min(depth, len(counts))
+            start_time = time.perf_counter()
+            nodes = board.perft(current_depth)
+            elapsed = time.perf_counter() - start_time
+            if nodes != counts[current_depth - 1]:
+                print("%s: %s perft %d FAILED (expected %d)" % (name, backend, nodes, counts[current_depth - 1]))
+                passed = False
+            speed[backend] = nodes / max(elapsed, 1e-9)
+            totals[backend][0] += nodes
+            totals[backend][1] += elapsed
+        print(
+            "%-18s %10.1f %11.1f %10.0f %11.0f %7.2fx"
+            % (
+                name,
+                generation["mailbox"],
+                generation["bitboard"],
+                speed["mailbox"],
+                speed["bitboard"],
+                speed["bitboard"] / speed["mailbox"],
+            )
+        )
+    mailbox_speed = totals["mailbox"][0] / max(totals["mailbox"][1], 1e-9)
+    bitboard_speed = totals["bitboard"][0] / max(totals["bitboard"][1], 1e-9)
+    print(
+        "Total perft: mailbox %.0f nodes/s, bitboard %.0f nodes/s, speedup %.2fx"
+        % (mailbox_speed, bitboard_speed, bitboard_speed / mailbox_speed)
+    )
+    return passed
+
+
+def run_perft_divide(fen, depth, backend="mailbox"):
+    """The function prints the perft node count below every legal move of a position.
+    Inputs:
+            - fen: string
+            - depth: integer
+            - backend: string, key of BOARD_BACKENDS"""
+    board = BOARD_BACKENDS[backend].from_fen(fen)
+    counts = board.perft_divide(depth)
+    for move in sorted(counts):
+        print("%s: %d" % (move, counts[move]))
+    print("Moves: %d" % len(counts))
+    print("Nodes: %d" % sum(counts.values()))
+
+
+def main(argv=None):
+    """This function parses the command line and runs the headless benchmarks."""
+    parser = argparse.ArgumentParser(description="Headless benchmarks for the chess rules.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    perft_parser = commands.add_parser("perft", help="check move generation node counts")
+    perft_parser.add_argument("--depth", type=int, default=3)
+    perft_parser.add_argument("--divide", action="store_true", help="split the count by move")
+    perft_parser.add_argument("--fen", default=STARTING_FEN, help="position used by --divide")
+    perft_parser.add_argument("--backend", choices=sorted(BOARD_BACKENDS), default="mailbox")
+
+    backend_parser = commands.add_parser("backends", help="compare the mailbox and bitboard boards")
+    backend_parser.add_argument("--depth", type=int, default=3)
+    backend_parser.add_argument("--calls", type=int, default=1000)
+
+    search_parser = commands.add_parser("search", help="measure engine time to depth")
+    search_parser.add_argument("--depth", type=int, default=4)
+    search_parser.add_argument("--workers", type=int, default=1, help="compare 1 and N processes")
+
+    fen_parser = commands.add_parser("fen", help="measure FEN parsing and writing speed")
+    fen_parser.add_argument("--seconds", type=float, default=1.0)
+
+    pgn_parser = commands.add_parser("pgn", help="measure PGN reading and replay speed")
+    pgn_parser.add_argument("--file", help="PGN archive, random games are generated if omitted")
+    pgn_parser.add_argument("--games", type=int, default=200)
+
+    store_parser = commands.add_parser("store", help="measure the packed position store")
+    store_parser.add_argument("--positions", type=int, default=20000)
+    store_parser.add_argument("--reads", type=int, default=5000)
+
+    book_parser = commands.add_parser("book", help="build an opening book and measure probes")
+    book_parser.add_argument("--file", help="PGN games, random games are generated if omitted")
+    book_parser.add_argument("--games", type=int, default=200)
+    book_parser.add_argument("--probes", type=int, default=100000)
+
+    tablebase_parser = commands.add_parser("tablebase", help="generate endgame tables and measure probes")
+    tablebase_parser.add_argument("--directory", default="tablebases")
+    tablebase_parser.add_argument("--probes", type=int, default=100000)
+
+    uci_parser = commands.add_parser("uci", help="measure UCI engine startup to readyok")
+    uci_parser.add_argument("--runs", type=int, default=20)
+
+    import_parser = commands.add_parser("import", help="measure cold import time of the rules core")
+    import_parser.add_argument("--runs", type=int, default=20)
+
+    args = parser.parse_args(argv)
+    if args.command == "perft":
+        if args.divide:
+            run_perft_divide(args.fen, args.depth, args.backend)
+            return 0
+        return 0 if run_perft_suite(args.depth, args.backend) else 1
+    if args.command == "backends":
+        return 0 if run_backend_benchmark(args.depth, args.calls) else 1
+    if args.command == "search":
+        single_time = run_search_benchmark(args.depth, 1)
+        if args.workers > 1:
+            parallel_time = run_search_benchmark(args.depth, args.workers)
+            print("Speedup with %d workers: %.2fx" % (args.workers, single_time / parallel_time))
+    if args.command == "fen":
+        run_fen_benchmark(args.seconds)
+    if args.command == "pgn":
+        run_pgn_benchmark(args.file, args.games)
+    if args.command == "store":
+        run_store_benchmark(args.positions, args.reads)
+    if args.command == "book":
+        run_book_benchmark(args.file, args.games, args.probes)
+    if args.command == "tablebase":
+        run_tablebase_benchmark(args.directory, args.probes)
+    if args.command == "uci":
+        run_uci_benchmark(args.runs)
+    if args.command == "import":
+        return 0 if run_import_benchmark(args.runs) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,55 +2,110 @@ import pygame
 import sys
 
 # Import classes from local files.
-from ChessBoard import ChessBoard
-from ChessPieces import ChessPieces
 from ChessGame import ChessGame
+from ChessRenderer import SCREEN_WIDTH, SCREEN_HEIGHT
 
-# Declare constants for screen dimensions.
-SCREEN_WIDTH = 600
-SCREEN_HEIGHT = 600
+# Frame rate of the event loop while the computer is thinking.
+FRAME_RATE = 60
+CAPTION = "Chess Game"
+USAGE = "Usage: python chess.py [--ai] [--book PATH] [--tablebase DIR]"
 
-# Define the size of the chessboard and its tiles.
-BOARD_ROWS = 8
-BOARD_COLUMNS = 8
-SQUARE_SIZE = SCREEN_WIDTH // BOARD_COLUMNS
+
+def option_value(arguments, flag):
+    """The function returns the value given after a command line flag.
+    Inputs:
+            - arguments: list of strings
+            - flag: string such as --book
+    Output:
+            - value: string, or None when the flag is not given"""
+    if flag not in arguments:
+        return None
+    index = arguments.index(flag) + 1
+    if index >= len(arguments) or arguments[index].startswith("--"):
+        raise ValueError("%s needs a value" % flag)
+    return arguments[index]
 
 
 
 def main():
     '''This function executes the chess game GUI. '''
-    
+
+    # Read the options before opening the window.
+    arguments = sys.argv[1:]
+    try:
+        book_path = option_value(arguments, "--book")
+        tablebase_path = option_value(arguments, "--tablebase")
+    except ValueError as error:
+        print("%s\n%s" % (error, USAGE), file=sys.stderr)
+        return 2
+    # The computer plays black if requested.
+    engine_color = "black" if "--ai" in arguments else None
+
     # Set up pygame window and clock.
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Chess Game")
+    pygame.display.set_caption(CAPTION)
     clock = pygame.time.Clock()
+    caption = CAPTION
+    # Only wake up for the events the game reacts to, so the window idles without using the CPU.
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(
+        [pygame.QUIT, pygame.MOUSEBUTTONDOWN, pygame.KEYDOWN, pygame.VIDEOEXPOSE]
+    )
 
     # Create instance of ChessGame class.
-    game = ChessGame(screen)
+    game = ChessGame(
+        screen, engine_color=engine_color, book_path=book_path, tablebase_path=tablebase_path
+    )
     running = True
 
     # Start the game loop
     while running:
-        for event in pygame.event.get():
-            # Check quit event and stop loop.
+        # Redraw and update only the squares that changed.
+        dirty_rects = game.render(screen)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+
+        # Let the computer answer once the player's move is on screen.
+        if game.update():
+            continue
+
+        # Show the progress of the computer in the window title.
+        thinking = game.is_thinking()
+        new_caption = "%s - %s" % (CAPTION, game.search_status()) if thinking else CAPTION
+        if new_caption != caption:
+            caption = new_caption
+            pygame.display.set_caption(caption)
+
+        if thinking:
+            # Keep handling events at frame rate while the computer searches.
+            events = pygame.event.get()
+            clock.tick(FRAME_RATE)
+        else:
+            # Sleep until the next event instead of redrawing every frame.
+            events = [pygame.event.wait()]
+
+        for event in events:
+            # Check quit event, stop the search and the loop.
             if event.type == pygame.QUIT:
+                game.cancel_search()
                 running = False
             # Check mouse button event and pass position to game.
             elif event.type == pygame.MOUSEBUTTONDOWN:
-                pos = pygame.mouse.get_pos()
-                game.handle_mouse_click(pos)
-
-        # Clear screen with black before drawing.
-        screen.fill((0,0,0))
-
-        # Draw the board, maintaing 60 frames per second.  
-        game.board.draw(screen)
-        pygame.display.flip()
-        clock.tick(60)
+                game.handle_mouse_click(event.pos)
+            # Space makes the computer move now, N starts a new game.
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    game.move_now()
+                elif event.key == pygame.K_n:
+                    game.new_game()
+            # Redraw everything when the window content was lost.
+            elif event.type == pygame.VIDEOEXPOSE:
+                game.invalidate()
 
     pygame.quit()
+    return 0
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
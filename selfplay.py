@@ -0,0 +1,234 @@
+import argparse
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from ChessBoard import ChessBoard, STARTING_FEN, move_to_uci
+from ChessEngine import ChessEngine
+
+# Games longer than this many moves per side are adjudicated as draws.
+DEFAULT_MAX_MOVES = 200
+
+
+class RandomPolicy:
+    """Move policy that plays a uniformly random legal move."""
+
+    def __init__(self, seed=None):
+        """The function initializes the random number generator of the policy."""
+        self.random = random.Random(seed)
+
+    def choose_move(self, board):
+        """The function picks a random legal move.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - move: (start, end, promotion) tuple"""
+        return self.random.choice(board.generate_legal_moves())
+
+
+class EnginePolicy:
+    """Move policy that plays the best move found by ChessEngine."""
+
+    def __init__(self, depth, time_limit=None, hash_size_mb=4):
+        """The function creates the engine used by the policy.
+        Inputs:
+                - depth: integer, maximum search depth
+                - time_limit: float seconds per move or None
+                - hash_size_mb: integer, memory budget of the transposition table"""
+        self.engine = ChessEngine(max_depth=depth, time_limit=time_limit, hash_size_mb=hash_size_mb)
+
+    def choose_move(self, board):
+        """The function searches the best move.
+        Inputs:
+                - board: ChessBoard
+        Output:
+                - move: (start, end, promotion) tuple"""
+        best_move, _, _ = self.engine.search(board)
+        return best_move
+
+
+def create_policy(spec, seed=None):
+    """The function builds a policy from its description.
+    Inputs:
+            - spec: string, "random", "engine:DEPTH" or "engine:DEPTH:SECONDS"
+            - seed: integer seed of random policies
+    Output:
+            - policy: object with a choose_move(board) method"""
+    fields = spec.split(":")
+    if fields[0] == "random":
+        return RandomPolicy(seed)
+    if fields[0] == "engine":
+        depth = int(fields[1]) if len(fields) > 1 else 3
+        time_limit = float(fields[2]) if len(fields) > 2 else None
+        return EnginePolicy(depth, time_limit)
+    raise ValueError("Unknown policy: %s" % spec)
+
+
+def has_insufficient_material(board):
+    """The function checks if neither player can mate: bare kings or a single minor piece."""
+    remaining = [
+        piece.piece_type
+        for color in ("white", "black")
+        for piece in board.pieces[color]
+        if piece.piece_type != "king"
+    ]
+    return not remaining or (len(remaining) == 1 and remaining[0] in ("knight", "bishop"))
+
+
+def play_game(white_policy, black_policy, start_fen=STARTING_FEN, max_moves=DEFAULT_MAX_MOVES):
+    """The function plays a full game between two policies without any display.
+    Inputs:
+            - white_policy: object with a choose_move(board) method
+            - black_policy: object with a choose_move(board) method
+            - start_fen: string, starting position
+            - max_moves: integer, moves per side before the game is adjudicated as a draw
+    Output:
+            - record: dictionary with the moves, result, termination and move timings"""
+    board = ChessBoard.from_fen(start_fen)
+    policies = {"white": white_policy, "black": black_policy}
+    seen_positions = {board.hash: 1}
+    moves = []
+    move_times = []
+    result, termination = "1/2-1/2", "move limit"
+
+    while len(moves) < 2 * max_moves:
+        if not board.has_legal_moves(board.turn):
+            status = board.check_game_status(board.turn)
+            if status == "Checkmate":
+                result = "0-1" if board.turn == "white" else "1-0"
+            termination = status.lower()
+            break
+        if board.halfmove_clock >= 100:
+            termination = "fifty-move rule"
+            break
+        if seen_positions[board.hash] >= 3:
+            termination = "threefold repetition"
+            break
+        if has_insufficient_material(board):
+            termination = "insufficient material"
+            break
+
+        start_time = time.perf_counter()
+        move = policies[board.turn].choose_move(board)
+        move_times.append(round(time.perf_counter() - start_time, 6))
+        # Keep the undo records so engine players see repetitions of earlier positions.
+        board.undo_stack.append(board.make_move(move))
+        moves.append(move_to_uci(move))
+        seen_positions[board.hash] = seen_positions.get(board.hash, 0) + 1
+
+    return {
+        "start_fen": start_fen,
+        "moves": moves,
+        "result": result,
+        "termination": termination,
+        "move_times": move_times,
+    }
+
+
+def _play_game_task(task):
+    """The function plays one game of a batch in a worker process.
+    Inputs:
+            - task: (game index, white spec, black spec, seed, start fen, max moves) tuple
+    Output:
+            - record: dictionary returned by play_game plus the game index and policies"""
+    index, white_spec, black_spec, seed, start_fen, max_moves = task
+    start_time = time.perf_counter()
+    record = play_game(
+        create_policy(white_spec, seed),
+        create_policy(black_spec, seed + 1),
+        start_fen,
+        max_moves,
+    )
+    record.update(
+        game=index,
+        white=white_spec,
+        black=black_spec,
+        seconds=round(time.perf_counter() - start_time, 3),
+    )
+    return record
+
+
+def run_games(
+    first_spec,
+    second_spec,
+    games,
+    output_path,
+    workers=1,
+    seed=0,
+    start_fen=STARTING_FEN,
+    max_moves=DEFAULT_MAX_MOVES,
+):
+    """The function plays a batch of games across worker processes and streams every finished
+    game as one JSON line to the output file. The two policies swap colors every game.
+    Inputs:
+            - first_spec: string, policy description
+            - second_spec: string, policy description
+            - games: integer
+            - output_path: string, JSON lines file
+            - workers: integer, number of processes
+            - seed: integer, base seed of the random policies
+            - start_fen: string
+            - max_moves: integer
+    Output:
+            - scores: dictionary {policy spec: points}"""
+    tasks = []
+    for index in range(games):
+        white_spec, black_spec = (first_spec, second_spec) if index % 2 == 0 else (second_spec, first_spec)
+        tasks.append((index, white_spec, black_spec, seed + 2 * index, start_fen, max_moves))
+
+    scores = {first_spec: 0.0, second_spec: 0.0}
+    if first_spec == second_spec:
+        scores = {"white": 0.0, "black": 0.0}
+    with open(output_path, "w") as output, ProcessPoolExecutor(max_workers=workers) as pool:
+        for record in pool.map(_play_game_task, tasks, chunksize=max(1, games // (workers * 8))):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+
+            white_key, black_key = record["white"], record["black"]
+            if first_spec == second_spec:
+                white_key, black_key = "white", "black"
+            if record["result"] == "1-0":
+                scores[white_key] += 1
+            elif record["result"] == "0-1":
+                scores[black_key] += 1
+            else:
+                scores[white_key] += 0.5
+                scores[black_key] += 0.5
+    return scores
+
+
+def main(argv=None):
+    """This function parses the command line and runs a self-play match."""
+    parser = argparse.ArgumentParser(description="Headless self-play between two move policies.")
+    parser.add_argument("--first", default="engine:2", help='"random" or "engine:DEPTH[:SECONDS]"')
+    parser.add_argument("--second", default="random", help='"random" or "engine:DEPTH[:SECONDS]"')
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-moves", type=int, default=DEFAULT_MAX_MOVES)
+    parser.add_argument("--fen", default=STARTING_FEN, help="starting position of every game")
+    parser.add_argument("--output", default="selfplay.jsonl", help="JSON lines file of the games")
+    args = parser.parse_args(argv)
+
+    start_time = time.perf_counter()
+    scores = run_games(
+        args.first,
+        args.second,
+        args.games,
+        args.output,
+        args.workers,
+        args.seed,
+        args.fen,
+        args.max_moves,
+    )
+    elapsed = time.perf_counter() - start_time
+    for spec, points in scores.items():
+        print("%s: %.1f / %d" % (spec, points, args.games))
+    print("%d games in %.1fs (%.2f games/s)" % (args.games, elapsed, args.games / max(elapsed, 1e-9)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
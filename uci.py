@@ -0,0 +1,245 @@
+import sys
+import threading
+import time
+
+# Only the rules and the engine are imported, so the engine starts quickly and runs
+# without pygame or a display.
+from ChessBoard import ChessBoard, STARTING_FEN, move_to_uci
+from ChessEngine import ChessEngine, BackgroundSearch, MATE_SCORE, MATE_BOUND, MAX_PLY
+
+ENGINE_NAME = "ChessGame"
+DEFAULT_HASH_MB = 16
+# Deepest iteration of a search without a depth limit.
+MAX_SEARCH_DEPTH = 32
+# Share of the remaining clock used for one move when no move time is given.
+DEFAULT_MOVES_TO_GO = 30
+
+
+def format_score(score):
+    """The function converts an engine score to UCI notation.
+    Inputs:
+            - score: integer centipawns, or a mate score
+    Output:
+            - notation: string such as cp 35 or mate -3"""
+    if abs(score) >= MATE_BOUND:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return "mate %d" % (moves if score > 0 else -moves)
+    return "cp %d" % score
+
+
+def parse_position(tokens):
+    """The function builds the board described by the arguments of a position command.
+    Inputs:
+            - tokens: list of strings after "position", such as startpos moves e2e4 e7e5
+    Output:
+            - board: ChessBoard with the moves played"""
+    if "moves" in tokens:
+        moves = tokens[tokens.index("moves") + 1:]
+        tokens = tokens[:tokens.index("moves")]
+    else:
+        moves = []
+    if tokens and tokens[0] == "fen":
+        board = ChessBoard.from_fen(" ".join(tokens[1:]))
+    else:
+        board = ChessBoard.from_fen(STARTING_FEN)
+
+    for notation in moves:
+        for move in board.generate_legal_moves():
+            if move_to_uci(move) == notation:
+                # Keep the undo records so the engine sees repetitions of earlier positions.
+                board.undo_stack.append(board.make_move(move))
+                break
+        else:
+            raise ValueError("Illegal move: %s" % notation)
+    return board
+
+
+def search_limits(tokens, turn):
+    """The function converts the arguments of a go command into search limits.
+    Inputs:
+            - tokens: list of strings after "go", such as depth 6 or wtime 60000 btime 60000
+            - turn: string, color to move
+    Output:
+            - max_depth: integer
+            - time_limit: float seconds or None
+            - node_limit: integer or None
+            - infinite: boolean, wait for stop before reporting the best move"""
+    values = {}
+    for index, token in enumerate(tokens[:-1]):
+        if tokens[index + 1].lstrip("-").isdigit():
+            values[token] = int(tokens[index + 1])
+
+    max_depth = min(values.get("depth", MAX_SEARCH_DEPTH), MAX_PLY - 1)
+    node_limit = values.get("nodes")
+    time_limit = None
+    if "movetime" in values:
+        time_limit = values["movetime"] / 1000
+    else:
+        remaining = values.get("wtime" if turn == "white" else "btime")
+        if remaining is not None:
+            increment = values.get("winc" if turn == "white" else "binc", 0)
+            moves_to_go = max(values.get("movestogo", DEFAULT_MOVES_TO_GO), 1)
+            time_limit = min(remaining / moves_to_go + increment / 2, remaining / 2) / 1000
+    infinite = "infinite" in tokens or not (
+        values.keys() & {"depth", "nodes", "movetime", "wtime", "btime"}
+    )
+    return max_depth, time_limit, node_limit, infinite
+
+
+class UciEngine:
+    """Universal Chess Interface front end of ChessEngine reading commands from a stream."""
+
+    def __init__(self, output=sys.stdout):
+        """The function initializes the protocol state. The engine and its hash table are
+        created on the first search, so the program answers readyok right away.
+        Inputs:
+                - output: text stream the answers are written to"""
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.board = ChessBoard.from_fen(STARTING_FEN)
+        self.hash_size_mb = DEFAULT_HASH_MB
+        self.engine = None
+        self.search = None
+        self.reporter = None
+        self.infinite = False
+
+    def send(self, line):
+        """The function writes one line of the protocol and flushes it."""
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """The function runs one command.
+        Inputs:
+                - line: string
+        Output:
+                - running: boolean, False after quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send("id name %s" % ENGINE_NAME)
+            self.send("id author %s authors" % ENGINE_NAME)
+            self.send("option name Hash type spin default %d min 1 max 1024" % DEFAULT_HASH_MB)
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            self.set_option(arguments)
+        elif command == "ucinewgame":
+            self.wait()
+            if self.engine is not None:
+                self.engine.clear_tables()
+            self.board = ChessBoard.from_fen(STARTING_FEN)
+        elif command == "position":
+            self.wait()
+            try:
+                self.board = parse_position(arguments)
+            except (ValueError, IndexError) as error:
+                self.send("info string %s" % error)
+        elif command == "go":
+            self.go(arguments)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            self.stop()
+            return False
+        else:
+            self.send("info string Unknown command: %s" % command)
+        return True
+
+    def set_option(self, arguments):
+        """The function changes an engine option.
+        Inputs:
+                - arguments: list of strings, name NAME value VALUE"""
+        if "name" not in arguments or "value" not in arguments:
+            return
+        name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")])
+        value = " ".join(arguments[arguments.index("value") + 1:])
+        if name.lower() == "hash" and value.isdigit():
+            self.wait()
+            self.hash_size_mb = max(1, int(value))
+            self.engine = None
+
+    def go(self, arguments):
+        """The function starts searching the current position in the background.
+        Inputs:
+                - arguments: list of strings after go"""
+        self.wait()
+        if self.engine is None:
+            self.engine = ChessEngine(hash_size_mb=self.hash_size_mb)
+        max_depth, time_limit, node_limit, self.infinite = search_limits(arguments, self.board.turn)
+        start_time = time.perf_counter()
+        self.search = BackgroundSearch(self.engine, self.board, max_depth, time_limit, node_limit)
+        self.reporter = threading.Thread(
+            target=self.report, args=(self.search, self.infinite, start_time), daemon=True
+        )
+        self.reporter.start()
+
+    def report(self, search, infinite, start_time):
+        """The function waits for a search and sends its result, in its own thread.
+        Inputs:
+                - search: BackgroundSearch
+                - infinite: boolean, wait for stop before sending the best move
+                - start_time: float, perf_counter value when the search started"""
+        try:
+            result = search.take_result()
+        except Exception as error:
+            # A failed search still owes the GUI a best move, otherwise it waits forever.
+            self.send("info string search failed: %s" % error)
+            result = None
+        if infinite:
+            search.stop_event.wait()
+        elapsed = max(time.perf_counter() - start_time, 1e-9)
+        nodes = self.engine.nodes
+        if result is None or result[0] is None:
+            self.send("bestmove 0000")
+            return
+        best_move, score, principal_variation = result
+        self.send(
+            "info depth %d score %s nodes %d time %d nps %d pv %s"
+            % (
+                self.engine.depth_reached,
+                format_score(score),
+                nodes,
+                elapsed * 1000,
+                nodes / elapsed,
+                " ".join(move_to_uci(move) for move in principal_variation),
+            )
+        )
+        self.send("bestmove %s" % move_to_uci(best_move))
+
+    def stop(self):
+        """The function stops the running search, which still reports its best move."""
+        if self.search is not None:
+            self.search.move_now()
+            self.reporter.join()
+            self.search = None
+            self.reporter = None
+
+    def wait(self):
+        """The function lets a search with limits finish before the next command runs.
+        A search without limits only ends with stop, so it is stopped."""
+        if self.search is not None and not self.infinite:
+            self.reporter.join()
+        self.stop()
+
+
+def main(input_stream=sys.stdin, output=sys.stdout):
+    """This function reads UCI commands until quit or the end of the input."""
+    uci = UciEngine(output)
+    for line in input_stream:
+        if not uci.handle(line):
+            break
+    else:
+        # Let a search with limits report its move when the input ends.
+        uci.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())